@@ -0,0 +1,135 @@
+"""
+Benchmark Ollama prompt-eval time for the shared-prefix prompt layout.
+
+For each sample email the per-email prompts (intent, issue/action,
+decision, summary) are sent back to back to one endpoint, in two layouts:
+
+  prefix   prompts as shipped: EMAIL_PREFIX first, task after
+  legacy   the same text with the email block moved after the task
+           (how the prompts were laid out before)
+
+and Ollama's prompt_eval_count / prompt_eval_duration are summed per
+layout. Generation is capped at one token, so only prompt evaluation
+is measured.
+
+python scripts/bench_prompt_prefix.py
+python scripts/bench_prompt_prefix.py --eml samples/*.eml --model gemma2:27b --repeat 3
+"""
+
+import argparse
+import sys
+from email import policy
+from email.parser import BytesParser
+from pathlib import Path
+
+from ollama import Client
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from dispute_resolution.llm.prompts import (  # noqa: E402
+    DECISION_PROMPT,
+    INTENT_CLASSIFICATION_PROMPT,
+    ISSUE_ACTION_PROMPT,
+    SUMMARY_PROMPT,
+    TASK_HEADER,
+)
+
+SAMPLE_EMAILS = [
+    (
+        "Overcharge on invoice INV-2024-118",
+        "Hello,\n\nInvoice INV-2024-118 against PO-7781 was billed at INR 1,35,000 "
+        "whereas the agreed PO value is INR 1,20,000. The overcharged amount is "
+        "INR 15,000. Please issue a credit note for the difference.\n\nRegards,\nAnita",
+    ),
+    (
+        "Short payment - INV-5521",
+        "Hi team,\n\nWe received only INR 42,000 against invoice INV-5521 for "
+        "INR 48,500. Kindly release the balance payment or share the reason for "
+        "the deduction.\n\nThanks,\nRavi",
+    ),
+    (
+        "Query on recent invoice",
+        "Dear AP team,\n\nThere seems to be an issue with our last invoice. Could "
+        "you check and get back to us?\n\nBest,\nMeera",
+    ),
+]
+
+CANDIDATE_DISPUTES = (
+    '[{"id": "5b8c...", "summary": "Supplier reports INV-2024-118 overcharged by '
+    'INR 15,000 against the PO value and requests a credit note."}]'
+)
+
+
+def _load_eml(path: str) -> tuple[str, str]:
+    with open(path, "rb") as f:
+        message = BytesParser(policy=policy.default).parse(f)
+    part = message.get_body(preferencelist=("plain",))
+    return str(message.get("Subject", "")), part.get_content() if part else ""
+
+
+def _prompts(subject: str, body: str) -> list[str]:
+    return [
+        INTENT_CLASSIFICATION_PROMPT.format(subject=subject, body=body),
+        ISSUE_ACTION_PROMPT.format(subject=subject, body=body),
+        DECISION_PROMPT.format(subject=subject, body=body, disputes=CANDIDATE_DISPUTES),
+        SUMMARY_PROMPT.format(subject=subject, body=body),
+    ]
+
+
+def _legacy(prompt: str) -> str:
+    email, _, task = prompt.partition(TASK_HEADER)
+    return task.lstrip("\n") + "\n" + email
+
+
+def _run(client: Client, model: str, num_ctx: int, prompts: list[str]) -> tuple[int, float]:
+    tokens = 0
+    seconds = 0.0
+    for prompt in prompts:
+        response = client.chat(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            options={"temperature": 0.0, "num_ctx": num_ctx, "num_predict": 1},
+        )
+        tokens += response["prompt_eval_count"] or 0
+        seconds += (response["prompt_eval_duration"] or 0) / 1e9
+    return tokens, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="http://localhost:11434")
+    parser.add_argument("--model", default="gemma2:27b")
+    parser.add_argument("--num-ctx", type=int, default=16384, help="Use the deployed LLM_NUM_CTX")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the sample emails")
+    parser.add_argument("--eml", nargs="*", help="Use these .eml files instead of the built-in samples")
+    args = parser.parse_args()
+
+    emails = [_load_eml(path) for path in args.eml] if args.eml else SAMPLE_EMAILS
+    client = Client(host=args.host)
+
+    # Load the model first so neither layout pays for it
+    _run(client, args.model, args.num_ctx, ["warm-up"])
+
+    totals = {"legacy": [0, 0.0], "prefix": [0, 0.0]}
+    for _ in range(args.repeat):
+        for subject, body in emails:
+            prompts = _prompts(subject, body)
+            for layout, batch in (("legacy", [_legacy(p) for p in prompts]), ("prefix", prompts)):
+                tokens, seconds = _run(client, args.model, args.num_ctx, batch)
+                totals[layout][0] += tokens
+                totals[layout][1] += seconds
+
+    calls = args.repeat * len(emails) * 4
+    print(f"{args.model} | {calls} calls per layout | num_ctx={args.num_ctx}")
+    for layout, (tokens, seconds) in totals.items():
+        print(
+            f"{layout:>7}: {tokens:>7} prompt tokens evaluated | "
+            f"{seconds:7.2f}s prompt eval | {seconds / calls * 1000:7.1f} ms/call"
+        )
+    legacy_s, prefix_s = totals["legacy"][1], totals["prefix"][1]
+    if prefix_s:
+        print(f"prompt-eval speedup: {legacy_s / prefix_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Callable, Iterable
+
+from dispute_resolution.ingestion.gmail_client import (
+    GMAIL_BATCH_SIZE,
+    GmailSession,
+    MessagesNotFetched,
+    batch_get_messages,
+    default_session,
+    batch_modify_message_labels,
+    ensure_labels,
+    get_mailbox_history_id,
+    list_added_messages,
+    modify_message_labels,
+)
+
+
+class AsyncGmailClient:
+    """
+    Async adapter over the synchronous Gmail API client.
+
+    Every ``.execute()`` runs on a dedicated thread pool so the event loop
+    is never blocked. googleapiclient's HTTP transport is not thread-safe,
+    so each pool thread builds and reuses its own service object.
+
+    All service objects share one GmailSession, and the label map is
+    cached for the client's lifetime; keep one client open across polls
+    (see poller --daemon) to pay the setup cost once.
+    """
+
+    def __init__(
+        self,
+        session: GmailSession = default_session,
+        *,
+        max_workers: int = 8,
+    ):
+        self._session = session
+        self._label_map: dict[str, str] | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="gmail",
+        )
+        self._local = threading.local()
+
+    # -------------------------
+    # Plumbing
+    # -------------------------
+
+    def _service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self._session.build_service()
+            self._local.service = service
+        return service
+
+    def _call(self, fn: Callable, args: tuple, kwargs: dict):
+        return fn(self._service(), *args, **kwargs)
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            partial(self._call, fn, args, kwargs),
+        )
+
+    async def refresh_credentials(self) -> None:
+        """
+        Refresh the shared credentials if they are close to expiry,
+        so no Gmail call has to wait on a token refresh.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._session.credentials)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> "AsyncGmailClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+    # -------------------------
+    # Messages
+    # -------------------------
+
+    async def list_messages(
+        self,
+        *,
+        query: str,
+        max_results: int,
+        page_token: str | None = None,
+    ) -> dict:
+        def _list(service):
+            return service.users().messages().list(
+                userId="me",
+                q=query,
+                maxResults=max_results,
+                pageToken=page_token,
+            ).execute()
+
+        return await self._run(_list)
+
+    async def get_message(
+        self,
+        message_id: str,
+        *,
+        format: str = "full",
+        metadata_headers: list[str] | None = None,
+    ) -> dict:
+        def _get(service):
+            kwargs = {"userId": "me", "id": message_id, "format": format}
+            if metadata_headers:
+                kwargs["metadataHeaders"] = metadata_headers
+            return service.users().messages().get(**kwargs).execute()
+
+        return await self._run(_get)
+
+    async def iter_messages(
+        self,
+        message_ids: Iterable[str],
+        *,
+        format: str = "full",
+        metadata_headers: list[str] | None = None,
+        batch_size: int = GMAIL_BATCH_SIZE,
+        unfetched: list[str] | None = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Batch-fetch messages and yield them in ID order.
+        At most ``batch_size`` messages are held in memory at once.
+
+        IDs that could not be fetched are appended to ``unfetched``;
+        without it, MessagesNotFetched is raised at the end.
+        """
+        ids = list(message_ids)
+        failed: list[str] = []
+        for i in range(0, len(ids), batch_size):
+            chunk = ids[i:i + batch_size]
+            messages = await self._run(
+                lambda service: list(
+                    batch_get_messages(
+                        service,
+                        chunk,
+                        format=format,
+                        metadata_headers=metadata_headers,
+                        batch_size=batch_size,
+                        unfetched=failed,
+                    )
+                )
+            )
+            for message in messages:
+                yield message
+
+        if unfetched is not None:
+            unfetched.extend(failed)
+        elif failed:
+            raise MessagesNotFetched(failed)
+
+    async def modify_labels(
+        self,
+        message_id: str,
+        *,
+        add: list[str],
+        remove: list[str] | None = None,
+    ) -> None:
+        await self._run(
+            modify_message_labels,
+            message_id=message_id,
+            add=add,
+            remove=remove,
+        )
+
+    async def batch_modify_labels(
+        self,
+        message_ids: list[str],
+        *,
+        add: list[str],
+        remove: list[str] | None = None,
+    ) -> None:
+        await self._run(
+            batch_modify_message_labels,
+            message_ids=message_ids,
+            add=add,
+            remove=remove,
+        )
+
+    async def send_message(self, payload: dict) -> dict:
+        def _send(service):
+            return service.users().messages().send(
+                userId="me",
+                body=payload,
+            ).execute()
+
+        return await self._run(_send)
+
+    # -------------------------
+    # Labels
+    # -------------------------
+
+    async def list_labels(self) -> list[dict]:
+        def _labels(service):
+            return service.users().labels().list(userId="me").execute()
+
+        result = await self._run(_labels)
+        return result.get("labels", [])
+
+    async def ensure_labels(self) -> dict[str, str]:
+        """
+        Return {label_name: label_id}, creating missing labels.
+        Cached until reloaded by refresh_labels().
+        """
+        if self._label_map is None:
+            self._label_map = await self._run(ensure_labels)
+        return self._label_map
+
+    async def refresh_labels(self) -> dict[str, str]:
+        """
+        Reload the label map after Gmail rejected a cached label ID
+        (e.g. a label was deleted and recreated).
+        """
+        self._label_map = None
+        return await self.ensure_labels()
+
+    # -------------------------
+    # History
+    # -------------------------
+
+    async def get_history_id(self) -> str:
+        return await self._run(get_mailbox_history_id)
+
+    async def list_added_messages(
+        self,
+        *,
+        start_history_id: str,
+    ) -> tuple[list[dict], str]:
+        return await self._run(
+            list_added_messages,
+            start_history_id=start_history_id,
+        )
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dispute_resolution.models import IngestionCheckpoint
+
+
+async def load_checkpoint(db: AsyncSession, name: str) -> str | None:
+    """
+    Return the stored value for an ingestion checkpoint, or None if unset.
+    """
+    checkpoint = await db.get(IngestionCheckpoint, name)
+    return checkpoint.value if checkpoint else None
+
+
+async def save_checkpoint(db: AsyncSession, name: str, value: str | None) -> None:
+    """
+    Create or update an ingestion checkpoint.
+    The caller is responsible for committing.
+    """
+    checkpoint = await db.get(IngestionCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = IngestionCheckpoint(name=name)
+        db.add(checkpoint)
+
+    checkpoint.value = value
+    checkpoint.updated_at = datetime.now(timezone.utc)
+    await db.flush()
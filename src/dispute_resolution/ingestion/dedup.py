@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+from sqlalchemy import Text, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dispute_resolution.config import settings
+from dispute_resolution.models import ProcessedGmailMessage
+
+
+class RecentIds:
+    """
+    Bounded in-process set of recently processed Gmail message IDs.
+    Oldest entries are evicted first once ``maxsize`` is reached.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._ids: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, message_id: str) -> bool:
+        if message_id in self._ids:
+            self._ids.move_to_end(message_id)
+            return True
+        return False
+
+    def add(self, message_id: str) -> None:
+        if self.maxsize <= 0:
+            return
+        self._ids[message_id] = None
+        self._ids.move_to_end(message_id)
+        while len(self._ids) > self.maxsize:
+            self._ids.popitem(last=False)
+
+
+recent_processed = RecentIds(settings.RECENT_PROCESSED_CACHE_SIZE)
+
+
+def remember_processed(message_id: str) -> None:
+    recent_processed.add(message_id)
+
+
+async def filter_unprocessed(
+    db: AsyncSession,
+    message_ids: list[str],
+) -> list[str]:
+    """
+    Drop IDs already recorded in processed_gmail_messages.
+
+    Hot IDs are answered from the in-process cache; the rest are
+    resolved with a single ``gmail_message_id = ANY(:ids)`` query.
+    Input order is preserved.
+    """
+    candidates = [i for i in message_ids if i not in recent_processed]
+    if not candidates:
+        return []
+
+    result = await db.execute(
+        select(ProcessedGmailMessage.gmail_message_id).where(
+            ProcessedGmailMessage.gmail_message_id
+            == any_(bindparam("ids", candidates, type_=ARRAY(Text)))
+        )
+    )
+    processed = set(result.scalars().all())
+
+    for message_id in processed:
+        recent_processed.add(message_id)
+
+    return [i for i in candidates if i not in processed]
@@ -0,0 +1,99 @@
+import asyncio
+import zlib
+from typing import Any, AsyncIterable, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dispute_resolution.database import AsyncSessionLocal
+from dispute_resolution.utils.logging import logger
+
+
+_STOP = object()
+
+
+def _shard(key: str | None, workers: int, fallback: int) -> int:
+    if key is None:
+        return fallback % workers
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(key.encode()) % workers
+
+
+async def dispatch_by_key(
+    items: AsyncIterable[Any],
+    handler: Callable[[AsyncSession, Any], Awaitable[None]],
+    *,
+    key: Callable[[Any], str | None],
+    workers: int,
+    queue_size: int = 2,
+) -> int:
+    """
+    Run ``handler(db, item)`` over ``items`` with ``workers`` concurrent workers.
+
+    - Items with the same key always go to the same worker, so they are
+      handled one at a time in arrival order (e.g. per Gmail thread).
+    - Each worker owns its own AsyncSession from AsyncSessionLocal.
+    - A failing item is rolled back and logged; the rest keep going.
+    - If a worker itself dies (e.g. its rollback raises), the other
+      workers are cancelled and the error is re-raised instead of the
+      producer blocking on that worker's full queue.
+
+    Returns the number of items that failed.
+    """
+    workers = max(1, workers)
+    queues: list[asyncio.Queue] = [
+        asyncio.Queue(maxsize=queue_size) for _ in range(workers)
+    ]
+    failures = 0
+
+    async def _worker(index: int, queue: asyncio.Queue) -> None:
+        nonlocal failures
+        async with AsyncSessionLocal() as db:
+            while True:
+                item = await queue.get()
+                if item is _STOP:
+                    return
+                try:
+                    await handler(db, item)
+                except Exception:
+                    failures += 1
+                    logger.exception(f"Worker {index} failed to process item")
+                    await db.rollback()
+
+    tasks = [
+        asyncio.create_task(_worker(i, q))
+        for i, q in enumerate(queues)
+    ]
+
+    async def _put(queue: asyncio.Queue, item: Any) -> None:
+        put = asyncio.ensure_future(queue.put(item))
+        watched = set(tasks)
+        while True:
+            done, _ = await asyncio.wait(
+                [put, *watched],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if put in done:
+                return
+            for task in done:
+                if task.cancelled() or task.exception() is not None:
+                    put.cancel()
+                    task.result()  # re-raises the worker's error
+            # Workers that stopped normally (after _STOP) are no concern
+            watched -= done
+
+    try:
+        position = 0
+        async for item in items:
+            shard = _shard(key(item), workers, position)
+            position += 1
+            await _put(queues[shard], item)
+
+        for queue in queues:
+            await _put(queue, _STOP)
+
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return failures
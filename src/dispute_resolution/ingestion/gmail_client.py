@@ -1,11 +1,25 @@
 import pickle
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Iterable, Iterator
 
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+
+from dispute_resolution.utils.logging import logger
 
 TOKEN_FILE = Path("token.pickle")
 
+# Gmail accepts at most 100 calls per batch HTTP request
+GMAIL_BATCH_SIZE = 100
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
 REQUIRED_LABELS = {
     "Processed": {
         "labelListVisibility": "labelShow",
@@ -26,22 +40,102 @@ REQUIRED_LABELS = {
 }
 
 
+class GmailSession:
+    """
+    Process-lifetime Gmail credentials and API client factory.
+
+    token.pickle is read once, the access token is refreshed shortly
+    before it expires (not after a failed call), and clients are built
+    from the discovery document bundled with googleapiclient instead of
+    re-reading or fetching it on every build.
+    """
+
+    def __init__(
+        self,
+        token_file: Path = TOKEN_FILE,
+        *,
+        refresh_margin_seconds: int = 300,
+    ):
+        self._token_file = token_file
+        self._refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self._creds = None
+        self._discovery_doc: str | None = None
+        self._lock = threading.Lock()
+
+    def _load_credentials(self):
+        if not self._token_file.exists():
+            raise RuntimeError(
+                "token.pickle not found. Run scripts/google_auth.py first to generate it."
+            )
+
+        with open(self._token_file, "rb") as f:
+            return pickle.load(f)
+
+    def _expiring(self, creds) -> bool:
+        if creds.expiry is None:
+            return False
+        # google-auth stores expiry as naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry - self._refresh_margin <= now
+
+    def credentials(self):
+        """
+        Return the shared credentials, refreshing them if they expire
+        within the refresh margin. Safe to call from any thread.
+        """
+        with self._lock:
+            if self._creds is None:
+                self._creds = self._load_credentials()
+
+            creds = self._creds
+            if creds.refresh_token and (creds.expired or self._expiring(creds)):
+                creds.refresh(Request())
+                logger.info(f"Refreshed Gmail credentials, valid until {creds.expiry}")
+
+            return creds
+
+    def _discovery_document(self) -> str | None:
+        if self._discovery_doc is None:
+            self._discovery_doc = get_static_doc("gmail", "v1")
+        return self._discovery_doc
+
+    def build_service(self):
+        """
+        Build a Gmail API client bound to the shared credentials.
+        Clients built here all see a refresh done by ``credentials()``.
+        """
+        creds = self.credentials()
+        doc = self._discovery_document()
+        if doc is None:
+            return build("gmail", "v1", credentials=creds, cache_discovery=False)
+        return build_from_document(doc, credentials=creds)
+
+
+default_session = GmailSession()
+
+
 def get_gmail_service():
     """
-    Load Gmail credentials and return an authenticated Gmail API client.
+    Return an authenticated Gmail API client from the process-wide session.
     """
-    if not TOKEN_FILE.exists():
-        raise RuntimeError(
-            "token.pickle not found. Run scripts/google_auth.py first to generate it."
-        )
+    return default_session.build_service()
 
-    with open(TOKEN_FILE, "rb") as f:
-        creds = pickle.load(f)
 
-    if creds.expired and creds.refresh_token:
-        creds.refresh(Request())
+class HistoryCursorExpired(RuntimeError):
+    """
+    Raised when Gmail no longer retains history for the stored historyId.
+    """
+
+
+class MessagesNotFetched(RuntimeError):
+    """
+    Raised after a batch fetch when some messages could not be fetched
+    (non-retryable errors or retries exhausted).
+    """
 
-    return build("gmail", "v1", credentials=creds)
+    def __init__(self, message_ids: list[str]):
+        super().__init__(f"{len(message_ids)} messages could not be fetched")
+        self.message_ids = message_ids
 
 
 def fetch_and_print_one_email():
@@ -100,6 +194,26 @@ def ensure_labels(service) -> dict[str, str]:
 
     return label_map
 
+def batch_modify_message_labels(
+    service,
+    *,
+    message_ids: list[str],
+    add: list[str],
+    remove: list[str] | None = None,
+):
+    """
+    Apply one label change to up to 1000 messages in a single call.
+    """
+    service.users().messages().batchModify(
+        userId="me",
+        body={
+            "ids": message_ids,
+            "addLabelIds": add,
+            "removeLabelIds": remove or [],
+        },
+    ).execute()
+
+
 def modify_message_labels(
     service,
     *,
@@ -114,4 +228,144 @@ def modify_message_labels(
             "addLabelIds": add,
             "removeLabelIds": remove or [],
         },
-    ).execute()
\ No newline at end of file
+    ).execute()
+
+
+def get_mailbox_history_id(service) -> str:
+    """
+    Return the current historyId of the mailbox.
+    """
+    profile = service.users().getProfile(userId="me").execute()
+    return str(profile["historyId"])
+
+
+def list_added_messages(
+    service,
+    *,
+    start_history_id: str,
+    label_id: str = "INBOX",
+) -> tuple[list[dict], str]:
+    """
+    List messages added to ``label_id`` since ``start_history_id``.
+
+    Returns: ([{"id": ..., "threadId": ...}], latest_history_id)
+    Raises HistoryCursorExpired if the cursor is too old (HTTP 404).
+    """
+    messages: list[dict] = []
+    seen: set[str] = set()
+    latest_history_id = start_history_id
+    page_token = None
+
+    while True:
+        try:
+            result = service.users().history().list(
+                userId="me",
+                startHistoryId=start_history_id,
+                historyTypes=["messageAdded"],
+                labelId=label_id,
+                pageToken=page_token,
+            ).execute()
+        except HttpError as e:
+            if e.resp.status == 404:
+                raise HistoryCursorExpired(start_history_id) from e
+            raise
+
+        for record in result.get("history", []):
+            for added in record.get("messagesAdded", []):
+                msg = added.get("message", {})
+                if msg.get("id") and msg["id"] not in seen:
+                    seen.add(msg["id"])
+                    messages.append(
+                        {"id": msg["id"], "threadId": msg.get("threadId")}
+                    )
+
+        latest_history_id = str(result.get("historyId", latest_history_id))
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            break
+
+    return messages, latest_history_id
+
+
+def _chunked(items: list[str], size: int) -> Iterator[list[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def batch_get_messages(
+    service,
+    message_ids: Iterable[str],
+    *,
+    format: str = "full",
+    metadata_headers: list[str] | None = None,
+    batch_size: int = GMAIL_BATCH_SIZE,
+    max_retries: int = 3,
+    unfetched: list[str] | None = None,
+) -> Iterator[dict]:
+    """
+    Fetch messages through the Gmail batch endpoint and yield them
+    in the order the IDs were given.
+
+    Failed sub-requests with a retryable status (429/5xx) are retried
+    with jittered backoff; missing messages (404) are logged and skipped.
+    IDs that fail otherwise or exhaust their retries are appended to
+    ``unfetched``; without it, MessagesNotFetched is raised once every
+    fetched message has been yielded.
+    """
+    ids = list(message_ids)
+    batch_size = max(1, min(batch_size, GMAIL_BATCH_SIZE))
+    failed: list[str] = []
+
+    for chunk in _chunked(ids, batch_size):
+        fetched: dict[str, dict] = {}
+        pending = chunk
+
+        for attempt in range(max_retries + 1):
+            retry: list[str] = []
+
+            def _callback(request_id, response, exception):
+                if exception is None:
+                    fetched[request_id] = response
+                    return
+
+                status = getattr(getattr(exception, "resp", None), "status", None)
+                if status == 404:
+                    logger.info(f"Message {request_id} no longer exists, skipping")
+                elif status in RETRYABLE_STATUSES:
+                    retry.append(request_id)
+                else:
+                    logger.error(f"Failed to fetch message {request_id}: {exception}")
+                    failed.append(request_id)
+
+            batch = service.new_batch_http_request(callback=_callback)
+            for message_id in pending:
+                kwargs = {"userId": "me", "id": message_id, "format": format}
+                if metadata_headers:
+                    kwargs["metadataHeaders"] = metadata_headers
+                batch.add(
+                    service.users().messages().get(**kwargs),
+                    request_id=message_id,
+                )
+            batch.execute()
+
+            if not retry:
+                break
+
+            if attempt == max_retries:
+                logger.error(
+                    f"Giving up on {len(retry)} messages after {max_retries} retries"
+                )
+                failed.extend(retry)
+                break
+
+            time.sleep(min(2 ** attempt, 30) + random.uniform(0, 1))
+            pending = retry
+
+        for message_id in chunk:
+            if message_id in fetched:
+                yield fetched[message_id]
+
+    if unfetched is not None:
+        unfetched.extend(failed)
+    elif failed:
+        raise MessagesNotFetched(failed)
@@ -1,31 +1,159 @@
 import base64
+import hashlib
+import html
+import re
+from datetime import datetime, timezone
+from email.header import decode_header, make_header
+from email.message import Message
+from email.utils import parsedate_to_datetime
+
+from dispute_resolution.config import settings
+from dispute_resolution.ingestion.reply_trimmer import trim_reply
 from dispute_resolution.utils.logging import logger
 
 
-def _decode(data: str) -> str:
-    return base64.urlsafe_b64decode(data).decode(errors="ignore")
+_CHARSET_RE = re.compile(r"charset\s*=\s*\"?([\w.:-]+)", re.IGNORECASE)
 
+_HTML_DROP_RE = re.compile(r"<(script|style|head)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_HTML_BREAK_RE = re.compile(r"<\s*/?\s*(br|p|div|tr|li|h[1-6]|table|blockquote)\b[^>]*>", re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_HSPACE_RE = re.compile(r"[ \t\r\f\v\xa0]+")
+_MESSAGE_ID_RE = re.compile(r"<([^>]+)>")
 
-def _extract_text(payload: dict) -> str:
-    # Single-part plain text
-    if payload.get("mimeType") == "text/plain":
-        data = payload.get("body", {}).get("data")
-        if data:
-            return _decode(data)
+# Headers kept (lower-cased) for the rule-based intent pre-classifier
+CLASSIFIER_HEADERS = (
+    "auto-submitted",
+    "x-autoreply",
+    "x-autorespond",
+    "x-auto-response-suppress",
+    "precedence",
+    "content-type",
+)
 
-    # Multipart
-    for part in payload.get("parts", []):
-        if part.get("mimeType") == "text/plain":
-            data = part.get("body", {}).get("data")
-            if data:
-                return _decode(data)
 
-    return ""
+def _header(part: dict, name: str) -> str:
+    return next(
+        (h["value"] for h in part.get("headers", []) if h["name"].lower() == name),
+        "",
+    )
 
 
-def parse_gmail_message(message: dict) -> dict:
-    payload = message.get("payload", {})
-    headers = payload.get("headers", [])
+def _charset(part: dict) -> str:
+    match = _CHARSET_RE.search(_header(part, "content-type"))
+    return match.group(1) if match else "utf-8"
+
+
+def _decode(data: str, charset: str = "utf-8", max_bytes: int | None = None) -> str:
+    """
+    Decode Gmail base64url body data.
+    With ``max_bytes`` the encoded string is cut BEFORE decoding, so an
+    oversized body is never fully materialised.
+    """
+    if max_bytes is not None:
+        # every 4 base64 chars decode to 3 bytes
+        data = data[: ((max_bytes + 2) // 3) * 4]
+
+    raw = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+    if max_bytes is not None:
+        raw = raw[:max_bytes]
+
+    try:
+        return raw.decode(charset, errors="ignore")
+    except LookupError:
+        return raw.decode(errors="ignore")
+
+
+def _html_to_text(markup: str) -> str:
+    """
+    Fast regex-based HTML → text. Good enough for LLM input, not for display.
+    """
+    text = _HTML_DROP_RE.sub(" ", markup)
+    text = _HTML_COMMENT_RE.sub(" ", text)
+    text = _HTML_BREAK_RE.sub("\n", text)
+    text = _HTML_TAG_RE.sub(" ", text)
+    return _HSPACE_RE.sub(" ", html.unescape(text))
+
+
+def _is_attachment(part: dict) -> bool:
+    return bool(part.get("filename")) or _header(
+        part, "content-disposition"
+    ).lower().startswith("attachment")
+
+
+def _find_text_parts(payload: dict) -> tuple[dict | None, dict | None]:
+    """
+    Walk the MIME tree iteratively (depth-first, document order) and return
+    the first inline text/plain and text/html parts that carry data.
+    """
+    plain = None
+    rich = None
+    stack = [payload]
+
+    while stack and plain is None:
+        part = stack.pop()
+        mime_type = part.get("mimeType", "").lower()
+
+        if mime_type.startswith("multipart/"):
+            stack.extend(reversed(part.get("parts", [])))
+            continue
+
+        if _is_attachment(part) or not part.get("body", {}).get("data"):
+            continue
+
+        if mime_type == "text/plain":
+            plain = part
+        elif mime_type == "text/html" and rich is None:
+            rich = part
+
+    return plain, rich
+
+
+def _normalize_lines(text: str) -> str:
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def _finalize_text(text: str, *, is_html: bool, max_chars: int) -> str:
+    if is_html:
+        text = _html_to_text(text)
+
+    text = _normalize_lines(text)
+    if len(text) > max_chars:
+        logger.warning(f"Email body of {len(text)} chars truncated to {max_chars} chars")
+        text = text[:max_chars]
+
+    return text
+
+
+def _extract_text(
+    payload: dict,
+    *,
+    max_bytes: int | None = None,
+    max_chars: int | None = None,
+) -> str:
+    max_bytes = settings.MAX_BODY_BYTES if max_bytes is None else max_bytes
+    max_chars = settings.MAX_BODY_CHARS if max_chars is None else max_chars
+
+    plain, rich = _find_text_parts(payload)
+    part = plain or rich
+    if part is None:
+        return ""
+
+    data = part["body"]["data"]
+    size = part["body"].get("size") or len(data) * 3 // 4
+    if size > max_bytes:
+        logger.warning(f"Email body of {size} bytes truncated to {max_bytes} bytes")
+
+    text = _decode(data, _charset(part), max_bytes)
+    return _finalize_text(text, is_html=part is rich, max_chars=max_chars)
+
+
+def parse_gmail_headers(message: dict) -> dict:
+    """
+    Parse identity and routing headers only.
+    Works on both format="metadata" and format="full" messages.
+    """
+    headers = message.get("payload", {}).get("headers", [])
 
     subject = next(
         (h["value"] for h in headers if h["name"].lower() == "subject"),
@@ -36,15 +164,128 @@ def parse_gmail_message(message: dict) -> dict:
         "(unknown sender)",
     )
 
-    body = _extract_text(payload)
-    body = "\n".join(line.strip() for line in body.splitlines() if line.strip())
-
-    logger.info(f"Parsed email | From: {sender} | Subject: {subject[:60]}")
+    received_at = None
+    if message.get("internalDate"):
+        received_at = datetime.fromtimestamp(
+            int(message["internalDate"]) / 1000, tz=timezone.utc
+        )
 
     return {
         "gmail_message_id": message["id"],
         "thread_id": message["threadId"],
         "sender": sender,
         "subject": subject,
+        "received_at": received_at,
+    }
+
+
+def _classifier_headers(pairs) -> dict[str, str]:
+    return {
+        name.lower(): str(value)
+        for name, value in pairs
+        if name.lower() in CLASSIFIER_HEADERS
+    }
+
+
+def parse_gmail_message(message: dict) -> dict:
+    parsed = parse_gmail_headers(message)
+    headers = _classifier_headers(
+        (h["name"], h["value"]) for h in message.get("payload", {}).get("headers", [])
+    )
+
+    body = _extract_text(message.get("payload", {}))
+
+    logger.info(f"Parsed email | From: {parsed['sender']} | Subject: {parsed['subject'][:60]}")
+
+    return {**parsed, "headers": headers, "body": body, "new_content": trim_reply(body)}
+
+
+# =================================================
+# Local RFC 822 messages (mbox / .eml replay)
+# =================================================
+
+def _mime_text(msg: Message, *, max_bytes: int, max_chars: int) -> str:
+    plain = None
+    rich = None
+    for part in msg.walk():
+        if part.is_multipart() or part.get_content_disposition() == "attachment":
+            continue
+        content_type = part.get_content_type()
+        if content_type == "text/plain":
+            plain = part
+            break
+        if content_type == "text/html" and rich is None:
+            rich = part
+
+    part = plain or rich
+    if part is None:
+        return ""
+
+    raw = part.get_payload(decode=True) or b""
+    if len(raw) > max_bytes:
+        logger.warning(f"Email body of {len(raw)} bytes truncated to {max_bytes} bytes")
+        raw = raw[:max_bytes]
+
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        text = raw.decode(charset, errors="ignore")
+    except LookupError:
+        text = raw.decode(errors="ignore")
+
+    return _finalize_text(text, is_html=part is rich, max_chars=max_chars)
+
+
+def _header_str(value, default: str) -> str:
+    if value is None:
+        return default
+    try:
+        return str(make_header(decode_header(str(value))))
+    except (UnicodeDecodeError, LookupError):
+        return str(value)
+
+
+def _message_ids(value: str | None) -> list[str]:
+    return _MESSAGE_ID_RE.findall(value or "")
+
+
+def parse_mime_message(msg: Message) -> dict:
+    """
+    Convert a local RFC 822 message into the parse_gmail_message() shape.
+
+    The Message-ID stands in for the Gmail message ID and the root of the
+    References chain for the thread ID.
+    """
+    raw_id = next(iter(_message_ids(msg.get("Message-ID"))), None)
+    if raw_id is None:
+        raw_id = hashlib.sha256(msg.as_bytes()).hexdigest()
+
+    thread_root = next(
+        iter(_message_ids(msg.get("References")) or _message_ids(msg.get("In-Reply-To"))),
+        raw_id,
+    )
+
+    received_at = None
+    if msg.get("Date"):
+        try:
+            received_at = parsedate_to_datetime(msg["Date"])
+        except (TypeError, ValueError):
+            received_at = None
+        if received_at is not None and received_at.tzinfo is None:
+            received_at = received_at.replace(tzinfo=timezone.utc)
+
+    body = _mime_text(
+        msg,
+        max_bytes=settings.MAX_BODY_BYTES,
+        max_chars=settings.MAX_BODY_CHARS,
+    )
+
+    return {
+        "gmail_message_id": raw_id,
+        "thread_id": thread_root,
+        "sender": _header_str(msg.get("From"), "(unknown sender)"),
+        "subject": _header_str(msg.get("Subject"), "(no subject)"),
+        "received_at": received_at,
+        "headers": _classifier_headers(msg.items()),
         "body": body,
+        "new_content": trim_reply(body),
     }
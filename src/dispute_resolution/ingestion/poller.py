@@ -1,10 +1,20 @@
 import asyncio
+import time
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dispute_resolution.config import settings
 from dispute_resolution.database import AsyncSessionLocal
-from dispute_resolution.ingestion.gmail_client import (
-    get_gmail_service,
-    ensure_labels
-)
-from dispute_resolution.ingestion.processor import process_message
+from dispute_resolution.ingestion.checkpoints import load_checkpoint, save_checkpoint
+from dispute_resolution.ingestion.dedup import filter_unprocessed
+from dispute_resolution.ingestion.dispatcher import dispatch_by_key
+from dispute_resolution.ingestion.async_gmail import AsyncGmailClient
+from dispute_resolution.ingestion.gmail_client import HistoryCursorExpired
+from dispute_resolution.ingestion.processor import process_message, triage_message
+from dispute_resolution.ingestion.work_queue import enqueue_messages
+from dispute_resolution.llm.client import awarm_up
+from dispute_resolution.services.outbox_service import flush_outbox, gmail_outbox
 from dispute_resolution.utils.logging import logger
 
 
@@ -12,53 +22,403 @@ DRY_RUN = False
 
 GMAIL_QUERY = "is:unread newer_than:3d"
 
+TRIAGE_HEADERS = ["From", "Subject"]
+
+HISTORY_CHECKPOINT = "gmail_history_id"
+
 
-async def _poll_async(max_results: int = 10) -> None:
+async def _list_query_messages(gmail: AsyncGmailClient, max_results: int) -> list[dict]:
+    result = await gmail.list_messages(query=GMAIL_QUERY, max_results=max_results)
+    return result.get("messages", [])
+
+
+async def _list_history_messages(
+    db: AsyncSession,
+    gmail: AsyncGmailClient,
+) -> tuple[list[dict], str]:
     """
-    Fetch recent Gmail messages and pass them to the processor.
+    List messages added since the stored historyId checkpoint.
+
+    Falls back to a bounded GMAIL_QUERY resync when no cursor exists
+    or Gmail has expired it. Returns (messages, next_history_id).
     """
-    service = get_gmail_service()
-    label_map = ensure_labels(service)
+    cursor = await load_checkpoint(db, HISTORY_CHECKPOINT)
 
-    result = service.users().messages().list(
-        userId="me",
-        q=GMAIL_QUERY,
-        maxResults=max_results,
-    ).execute()
+    if cursor:
+        try:
+            return await gmail.list_added_messages(start_history_id=cursor)
+        except HistoryCursorExpired:
+            logger.warning(
+                f"Gmail history cursor {cursor} expired, running bounded resync"
+            )
+    else:
+        logger.info("No Gmail history cursor stored, running bounded resync")
 
-    messages = result.get("messages", [])
-    if not messages:
-        logger.info("No new emails found")
-        return
+    # Capture the cursor BEFORE listing so nothing added in between is lost
+    history_id = await gmail.get_history_id()
+    messages = await _list_query_messages(gmail, settings.GMAIL_RESYNC_MAX_RESULTS)
+    return messages, history_id
+
+
+async def _triage(
+    db: AsyncSession,
+    gmail: AsyncGmailClient,
+    message_ids: list[str],
+    *,
+    batch_size: int | None = None,
+) -> tuple[list[str], int]:
+    """
+    Phase 1: fetch only From/Subject headers and return the IDs worth
+    a full fetch (not system mail, not processed, known supplier),
+    plus the number of messages that could not be fetched.
+    """
+    fetch_kwargs = {"batch_size": batch_size} if batch_size else {}
+    survivors: list[str] = []
+    unfetched: list[str] = []
+
+    async for msg in gmail.iter_messages(
+        message_ids,
+        format="metadata",
+        metadata_headers=TRIAGE_HEADERS,
+        unfetched=unfetched,
+        **fetch_kwargs,
+    ):
+        if await triage_message(db, gmail_outbox, msg):
+            survivors.append(msg["id"])
+
+    logger.info(f"Triage kept {len(survivors)} of {len(message_ids)} messages")
+    return survivors, len(unfetched)
+
+
+async def _screen(
+    db: AsyncSession,
+    gmail: AsyncGmailClient,
+    message_ids: list[str],
+    *,
+    batch_size: int | None = None,
+) -> tuple[list[str], int]:
+    """
+    Drop already-processed IDs in bulk and, with GMAIL_TRIAGE_FETCH,
+    noise found by a metadata-only pass. Returns the IDs left to process
+    and the number that failed to fetch during triage.
+    """
+    listed = len(message_ids)
+    message_ids = await filter_unprocessed(db, message_ids)
+    if len(message_ids) < listed:
+        logger.info(f"Skipped {listed - len(message_ids)} already processed messages")
+
+    failures = 0
+    if settings.GMAIL_TRIAGE_FETCH:
+        message_ids, failures = await _triage(
+            db,
+            gmail,
+            message_ids,
+            batch_size=batch_size,
+        )
+
+    return message_ids, failures
+
+
+async def _process_messages(
+    db: AsyncSession,
+    gmail: AsyncGmailClient,
+    messages: list[dict],
+    *,
+    workers: int,
+    batch_size: int | None = None,
+    enqueue: bool = False,
+) -> int:
+    """
+    Screen listed messages, then either process them here or hand them
+    to the durable work queue.
+
+    In-process: stream-fetch and process with ``workers`` concurrent
+    workers; messages in the same Gmail thread are processed in order.
+    Returns the number of messages that failed, including those Gmail
+    did not return.
+    """
+    message_ids, triage_failures = await _screen(
+        db,
+        gmail,
+        [m["id"] for m in messages],
+        batch_size=batch_size,
+    )
 
-    logger.info(f"Fetched {len(messages)} Gmail messages")
+    if enqueue:
+        keep = set(message_ids)
+        queued = await enqueue_messages(db, [m for m in messages if m["id"] in keep])
+        await db.commit()
+        logger.info(f"Queued {queued} messages for workers")
+        return triage_failures
 
+    async def _handle(db: AsyncSession, msg: dict) -> None:
+        if DRY_RUN:
+            logger.info(
+                f"[DRY RUN] Processing email "
+                f"ID={msg['id']} | "
+                f"Snippet={msg.get('snippet', '')[:80]}"
+            )
+
+        await process_message(db, gmail_outbox, msg)
+
+    fetch_kwargs = {"batch_size": batch_size} if batch_size else {}
+    unfetched: list[str] = []
+
+    failures = await dispatch_by_key(
+        gmail.iter_messages(message_ids, unfetched=unfetched, **fetch_kwargs),
+        _handle,
+        key=lambda msg: msg.get("threadId"),
+        workers=workers,
+    )
+    return failures + triage_failures + len(unfetched)
+
+
+async def _poll_once(
+    gmail: AsyncGmailClient,
+    max_results: int,
+    sync_mode: str,
+    workers: int,
+    enqueue: bool,
+) -> None:
+    """
+    One poll cycle on an already open Gmail client.
+
+    sync_mode:
+    - "query"   → re-run GMAIL_QUERY (first max_results matches)
+    - "history" → only messages added since the stored historyId
+    """
     async with AsyncSessionLocal() as db:
-        for m in messages:
-            msg = service.users().messages().get(
-                userId="me",
-                id=m["id"],
-                format="full",
-            ).execute()
-
-            if DRY_RUN:
+        next_cursor = None
+        if sync_mode == "history":
+            messages, next_cursor = await _list_history_messages(db, gmail)
+        else:
+            messages = await _list_query_messages(gmail, max_results)
+
+        if not messages:
+            logger.info("No new emails found")
+        else:
+            logger.info(f"Fetched {len(messages)} Gmail messages")
+
+        # Messages are fetched in batches of up to 100 and streamed
+        failures = await _process_messages(
+            db,
+            gmail,
+            messages,
+            workers=workers,
+            enqueue=enqueue,
+        )
+
+        # Deliver queued labels and replies
+        await flush_outbox(db, gmail)
+
+        # Advance the cursor only once the whole batch has been handled
+        if failures:
+            logger.warning(
+                f"{failures} messages failed, keeping history cursor for retry"
+            )
+        elif next_cursor:
+            await save_checkpoint(db, HISTORY_CHECKPOINT, next_cursor)
+            await db.commit()
+
+
+async def _poll_async(
+    max_results: int = 10,
+    sync_mode: str = "query",
+    workers: int = 1,
+    enqueue: bool = False,
+) -> None:
+    """
+    Fetch recent Gmail messages and pass them to the processor
+    (or, with ``enqueue``, to the work_items queue).
+    """
+    async with AsyncGmailClient() as gmail:
+        await _poll_once(gmail, max_results, sync_mode, workers, enqueue)
+
+
+async def _daemon_async(
+    interval: float = 30.0,
+    max_results: int = 10,
+    sync_mode: str = "history",
+    workers: int = 1,
+    enqueue: bool = False,
+) -> None:
+    """
+    Poll every ``interval`` seconds until interrupted.
+
+    One Gmail client lives for the whole process: credentials, per-thread
+    API clients and the label map are set up once, and credentials are
+    refreshed between cycles before they expire. A failed cycle is logged
+    and retried on the next tick.
+    """
+    logger.info(f"Poller daemon starting | sync_mode={sync_mode} | interval={interval}s")
+
+    # With --enqueue the workers run the LLM, not the poller
+    if settings.LLM_WARMUP and not enqueue:
+        await awarm_up()
+
+    async with AsyncGmailClient() as gmail:
+        while True:
+            started = time.monotonic()
+
+            try:
+                await gmail.refresh_credentials()
+                await _poll_once(gmail, max_results, sync_mode, workers, enqueue)
+            except Exception:
+                logger.exception("Poll cycle failed")
+
+            elapsed = time.monotonic() - started
+            logger.info(f"Poll cycle took {elapsed:.2f}s")
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+
+async def _iter_message_pages(
+    gmail: AsyncGmailClient,
+    *,
+    query: str,
+    page_size: int,
+) -> AsyncIterator[list[dict]]:
+    """
+    Yield the messages of each page of a Gmail search, from the first.
+    Only message/thread IDs are held per page.
+    """
+    page_token = None
+    while True:
+        result = await gmail.list_messages(
+            query=query,
+            max_results=page_size,
+            page_token=page_token,
+        )
+
+        yield result.get("messages", [])
+
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return
+
+
+async def _drain_async(
+    query: str = GMAIL_QUERY,
+    page_size: int = 100,
+    max_in_flight: int = 20,
+    workers: int = 1,
+    enqueue: bool = False,
+) -> None:
+    """
+    Process every message matching ``query`` until none is left.
+
+    Processing marks messages read, so an ``is:unread`` result set shrinks
+    under its page tokens and later pages skip messages. The search is
+    therefore walked in rounds from the first page, handling only IDs not
+    seen earlier in this drain, until a whole round turns up nothing new.
+    At most ``max_in_flight`` full messages are held at once. A restart
+    starts over; already processed IDs are skipped in bulk.
+    """
+    seen: set[str] = set()
+    rounds = 0
+    pages = 0
+    failures = 0
+
+    async with AsyncGmailClient() as gmail, AsyncSessionLocal() as db:
+        while True:
+            rounds += 1
+            fresh_in_round = 0
+
+            async for messages in _iter_message_pages(gmail, query=query, page_size=page_size):
+                fresh = [m for m in messages if m["id"] not in seen]
+                if not fresh:
+                    continue
+                seen.update(m["id"] for m in fresh)
+                fresh_in_round += len(fresh)
+
+                page_failures = await _process_messages(
+                    db,
+                    gmail,
+                    fresh,
+                    workers=workers,
+                    batch_size=max_in_flight,
+                    enqueue=enqueue,
+                )
+                if page_failures:
+                    logger.warning(f"{page_failures} messages failed on drained page {pages + 1}")
+                failures += page_failures
+
+                await flush_outbox(db, gmail)
+
+                pages += 1
                 logger.info(
-                    f"[DRY RUN] Processing email "
-                    f"ID={m['id']} | "
-                    f"Snippet={msg.get('snippet', '')[:80]}"
+                    f"Drained page {pages} (round {rounds}) | "
+                    f"{len(fresh)} new messages | {len(seen)} total"
                 )
 
-            await process_message(db, service, label_map, msg)
+            if not fresh_in_round:
+                break
+
+    logger.info(
+        f"Drain complete | {rounds} rounds | {pages} pages | "
+        f"{len(seen)} messages | {failures} failed"
+    )
 
 
-def poll(max_results: int = 10) -> None:
-    asyncio.run(_poll_async(max_results))
+def poll(
+    max_results: int = 10,
+    sync_mode: str | None = None,
+    workers: int | None = None,
+    enqueue: bool = False,
+) -> None:
+    asyncio.run(
+        _poll_async(
+            max_results,
+            sync_mode or settings.GMAIL_SYNC_MODE,
+            workers or settings.INGESTION_WORKERS,
+            enqueue,
+        )
+    )
+
+
+def daemon(
+    interval: float = 30.0,
+    max_results: int = 10,
+    sync_mode: str | None = None,
+    workers: int | None = None,
+    enqueue: bool = False,
+) -> None:
+    asyncio.run(
+        _daemon_async(
+            interval,
+            max_results,
+            sync_mode or settings.GMAIL_SYNC_MODE,
+            workers or settings.INGESTION_WORKERS,
+            enqueue,
+        )
+    )
+
+
+def drain(
+    query: str = GMAIL_QUERY,
+    page_size: int = 100,
+    max_in_flight: int = 20,
+    workers: int | None = None,
+    enqueue: bool = False,
+) -> None:
+    asyncio.run(
+        _drain_async(
+            query,
+            page_size,
+            max_in_flight,
+            workers or settings.INGESTION_WORKERS,
+            enqueue,
+        )
+    )
 
 
 def main():
     """
     Minimal CLI entrypoint:
     python -m dispute_resolution.ingestion.poller --max-results 5
+    python -m dispute_resolution.ingestion.poller --sync-mode history
+    python -m dispute_resolution.ingestion.poller --drain --query "is:unread"
+    python -m dispute_resolution.ingestion.poller --enqueue   (processed by ingestion.worker)
+    python -m dispute_resolution.ingestion.poller --daemon --interval 30
     """
     import argparse
 
@@ -69,9 +429,86 @@ def main():
         default=10,
         help="How many recent messages to fetch (default: 10)",
     )
+    parser.add_argument(
+        "--sync-mode",
+        choices=["query", "history"],
+        default=None,
+        help="query: re-run the unread search; history: incremental historyId sync "
+             f"(default: {settings.GMAIL_SYNC_MODE})",
+    )
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Keep processing --query matches until none is left",
+    )
+    parser.add_argument(
+        "--query",
+        default=GMAIL_QUERY,
+        help=f"Gmail search used by --drain (default: {GMAIL_QUERY!r})",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=100,
+        help="Messages listed per page in --drain mode (default: 100)",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=20,
+        help="Maximum fetched messages held at once in --drain mode (default: 20)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent processing workers; messages in one thread stay ordered "
+             f"(default: {settings.INGESTION_WORKERS})",
+    )
+    parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Only screen and queue messages in work_items; ingestion.worker processes them",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep one Gmail session open and poll every --interval seconds",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=30.0,
+        help="Seconds between poll cycles in --daemon mode (default: 30)",
+    )
     args = parser.parse_args()
 
-    poll(max_results=args.max_results)
+    if args.daemon:
+        daemon(
+            interval=args.interval,
+            max_results=args.max_results,
+            sync_mode=args.sync_mode,
+            workers=args.workers,
+            enqueue=args.enqueue,
+        )
+        return
+
+    if args.drain:
+        drain(
+            query=args.query,
+            page_size=args.page_size,
+            max_in_flight=args.max_in_flight,
+            workers=args.workers,
+            enqueue=args.enqueue,
+        )
+        return
+
+    poll(
+        max_results=args.max_results,
+        sync_mode=args.sync_mode,
+        workers=args.workers,
+        enqueue=args.enqueue,
+    )
 
 
 if __name__ == "__main__":
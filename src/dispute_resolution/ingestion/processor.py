@@ -1,9 +1,14 @@
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from dispute_resolution.ingestion.message_parser import parse_gmail_message
-from dispute_resolution.ingestion.gmail_client import modify_message_labels
+from dispute_resolution.ingestion.message_parser import (
+    parse_gmail_headers,
+    parse_gmail_message,
+)
+from dispute_resolution.ingestion.dedup import remember_processed
 from dispute_resolution.models import Email, ProcessedGmailMessage
 from dispute_resolution.services.dispute_resolution_service import resolve_email
+from dispute_resolution.services.outbox_service import GmailOutbox
 from dispute_resolution.services.supplier_service import get_supplier_by_domain
 from dispute_resolution.utils.logging import logger
 from dispute_resolution.config import settings
@@ -20,43 +25,92 @@ def is_system_email(parsed: dict) -> bool:
     return settings.SYSTEM_EMAIL_ADDRESS.lower() in sender
 
 
+async def _mark_system_email(
+    db: AsyncSession,
+    outbox: GmailOutbox,
+    gmail_id: str,
+) -> None:
+    logger.info(f"Ignoring SYSTEM email {gmail_id}")
+
+    # Ensure idempotency (single statement, no read-before-write)
+    await db.execute(
+        insert(ProcessedGmailMessage)
+        .values(gmail_message_id=gmail_id, was_dispute=False)
+        .on_conflict_do_nothing(index_elements=["gmail_message_id"])
+    )
+
+    # Mark processed + read in Gmail (via outbox, same transaction)
+    await outbox.modify_labels(
+        db,
+        gmail_id,
+        add=["Processed"],
+        remove=["UNREAD"],
+    )
+
+    await db.commit()
+    remember_processed(gmail_id)
+
+
+async def triage_message(
+    db: AsyncSession,
+    outbox: GmailOutbox,
+    metadata_message: dict,
+) -> bool:
+    """
+    Screen a format="metadata" message (From/Subject only).
+
+    Applies the same system-email and supplier checks as process_message()
+    so noise is dropped before its body is downloaded. Already-processed
+    IDs are expected to be removed in bulk by dedup.filter_unprocessed().
+    Returns True if the message should be fully fetched and processed.
+    """
+    parsed = parse_gmail_headers(metadata_message)
+    gmail_id = parsed["gmail_message_id"]
+
+    if is_system_email(parsed):
+        await _mark_system_email(db, outbox, gmail_id)
+        return False
+
+    domain = _extract_domain(parsed["sender"])
+    if not domain:
+        logger.warning(f"Could not extract domain from sender: {parsed['sender']}")
+        return False
+
+    if not await get_supplier_by_domain(db, domain):
+        logger.info(f"Unknown supplier domain '{domain}', skipping")
+        return False
+
+    return True
+
+
 async def process_message(
     db: AsyncSession,
-    gmail_service,
-    label_map: dict[str, str],
+    outbox: GmailOutbox,
     gmail_message: dict,
 ) -> None:
     """
     Ingest a Gmail message and delegate all business logic to resolve_email().
-    Gmail labeling is applied AFTER DB commit.
+    Gmail labeling is queued in the outbox with the processed state.
     """
+    await ingest_parsed(db, outbox, parse_gmail_message(gmail_message))
+
 
-    parsed = parse_gmail_message(gmail_message)
+async def ingest_parsed(
+    db: AsyncSession,
+    outbox: GmailOutbox,
+    parsed: dict,
+) -> None:
+    """
+    Run an already-parsed email (parse_gmail_message() shape) through
+    the pipeline. Shared by the Gmail poller and offline replay.
+    """
     gmail_id = parsed["gmail_message_id"]
 
     # -------------------------------------------------
     # 0. HARD STOP: Ignore system-generated emails
     # -------------------------------------------------
     if is_system_email(parsed):
-        logger.info(f"Ignoring SYSTEM email {gmail_id}")
-
-        # Ensure idempotency
-        if not await db.get(ProcessedGmailMessage, gmail_id):
-            db.add(
-                ProcessedGmailMessage(
-                    gmail_message_id=gmail_id,
-                    was_dispute=False,
-                )
-            )
-            await db.commit()
-
-        # Mark processed + read in Gmail
-        modify_message_labels(
-            service=gmail_service,
-            message_id=gmail_id,
-            add=[label_map["Processed"]],
-            remove=["UNREAD"],
-        )
+        await _mark_system_email(db, outbox, gmail_id)
         return
 
     # -------------------------------------------------
@@ -86,9 +140,12 @@ async def process_message(
         supplier_id=supplier.id,
         subject=parsed["subject"],
         body=parsed["body"],
+        new_content=parsed.get("new_content"),
         gmail_message_id=gmail_id,
         thread_id=parsed.get("thread_id"),
     )
+    if parsed.get("received_at"):
+        email.received_at = parsed["received_at"]
     db.add(email)
     await db.flush()
 
@@ -98,54 +155,56 @@ async def process_message(
     decision = await resolve_email(
         db=db,
         email=email,
-        gmail_service=gmail_service,
+        outbox=outbox,
         sender=parsed["sender"],
+        headers=parsed.get("headers"),
     )
 
     # -------------------------------------------------
-    # 5. Persist processed state
-    # -------------------------------------------------
-    was_dispute = decision is not None and decision["action"] in {"NEW", "MATCH"}
-
-    db.add(
-        ProcessedGmailMessage(
-            gmail_message_id=gmail_id,
-            was_dispute=was_dispute,
-        )
-    )
-    await db.commit()
-
-    # -------------------------------------------------
-    # 6. Gmail labeling (AFTER commit)
+    # 5. Gmail labeling (queued in the outbox by label name)
     # -------------------------------------------------
-    labels_to_add = [label_map["Processed"]]
+    labels_to_add = ["Processed"]
     labels_to_remove = ["UNREAD"]
 
     if decision is None:
         # Not a dispute
         if email.intent_status == "NOT_DISPUTE":
-            labels_to_add.append(label_map["Not_Dispute"])
+            labels_to_add.append("Not_Dispute")
         else:
-            labels_to_add.append(label_map["Needs_Clarification"])
+            labels_to_add.append("Needs_Clarification")
 
     else:
         action = decision["action"]
 
         if action in {"NEW", "MATCH"}:
             # ✅ Real dispute → ensure clarification label is NOT present
-            labels_to_add.append(label_map["Dispute"])
-            labels_to_remove.append(label_map["Needs_Clarification"])
+            labels_to_add.append("Dispute")
+            labels_to_remove.append("Needs_Clarification")
         else:
             # CLARIFICATION_SENT or WAITING
-            labels_to_add.append(label_map["Needs_Clarification"])
+            labels_to_add.append("Needs_Clarification")
 
-    modify_message_labels(
-        service=gmail_service,
-        message_id=gmail_id,
+    await outbox.modify_labels(
+        db,
+        gmail_id,
         add=labels_to_add,
         remove=labels_to_remove,
     )
 
+    # -------------------------------------------------
+    # 6. Persist processed state (same transaction as the labels)
+    # -------------------------------------------------
+    was_dispute = decision is not None and decision["action"] in {"NEW", "MATCH"}
+
+    db.add(
+        ProcessedGmailMessage(
+            gmail_message_id=gmail_id,
+            was_dispute=was_dispute,
+        )
+    )
+    await db.commit()
+    remember_processed(gmail_id)
+
     # -------------------------------------------------
     # 7. Logging
     # -------------------------------------------------
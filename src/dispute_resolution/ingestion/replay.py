@@ -0,0 +1,159 @@
+"""
+Offline replay of local mbox / .eml mail through the ingestion pipeline.
+
+Used for historical backfills and for measuring pipeline throughput
+without a live mailbox. Gmail side effects are recorded in memory,
+never written to the outbox or sent.
+
+python -m dispute_resolution.ingestion.replay ./backfill/ --workers 4
+"""
+
+import asyncio
+import email
+import mailbox
+import time
+from email import policy
+from email.message import Message
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dispute_resolution.ingestion.dispatcher import dispatch_by_key
+from dispute_resolution.ingestion.message_parser import parse_mime_message
+from dispute_resolution.ingestion.processor import ingest_parsed
+from dispute_resolution.llm.budget import budget_stats
+from dispute_resolution.services.intent_rules import rule_report
+from dispute_resolution.utils.logging import logger
+
+
+class RecordingOutbox:
+    """
+    Drop-in stand-in for GmailOutbox that keeps label changes and
+    outgoing replies in memory. Nothing reaches outbox_items or Gmail.
+    """
+
+    def __init__(self):
+        self.calls: list[tuple[str, dict]] = []
+
+    async def modify_labels(
+        self,
+        db: AsyncSession,
+        message_id: str,
+        *,
+        add: list[str],
+        remove: list[str] | None = None,
+    ) -> None:
+        self.calls.append(
+            ("modify_labels", {"id": message_id, "add": add, "remove": remove or []})
+        )
+
+    async def send_reply(
+        self,
+        db: AsyncSession,
+        message_id: str,
+        payload: dict,
+    ) -> None:
+        self.calls.append(("send_reply", {"id": message_id, **payload}))
+
+    def count(self, method: str) -> int:
+        return sum(1 for name, _ in self.calls if name == method)
+
+
+def _read_eml(path: Path) -> Message:
+    with open(path, "rb") as f:
+        return email.message_from_binary_file(f, policy=policy.default)
+
+
+def _iter_source_messages(paths: list[str]) -> Iterator[Message]:
+    """
+    Yield messages one at a time from .eml files, mbox files, or
+    directories containing either.
+    """
+    for raw_path in paths:
+        path = Path(raw_path)
+
+        if path.is_dir():
+            for eml in sorted(path.rglob("*.eml")):
+                yield _read_eml(eml)
+            for mbox in sorted(path.rglob("*.mbox")):
+                yield from mailbox.mbox(mbox, create=False)
+        elif path.suffix.lower() == ".eml":
+            yield _read_eml(path)
+        else:
+            yield from mailbox.mbox(path, create=False)
+
+
+async def _iter_parsed(paths: list[str], limit: int | None) -> AsyncIterator[dict]:
+    for i, msg in enumerate(_iter_source_messages(paths)):
+        if limit is not None and i >= limit:
+            return
+        yield parse_mime_message(msg)
+
+
+async def _replay_async(
+    paths: list[str],
+    workers: int = 4,
+    limit: int | None = None,
+) -> RecordingOutbox:
+    outbox = RecordingOutbox()
+    handled = 0
+
+    async def _handle(db: AsyncSession, parsed: dict) -> None:
+        nonlocal handled
+        await ingest_parsed(db, outbox, parsed)
+        handled += 1
+
+    started = time.perf_counter()
+    failures = await dispatch_by_key(
+        _iter_parsed(paths, limit),
+        _handle,
+        key=lambda parsed: parsed.get("thread_id"),
+        workers=workers,
+    )
+    elapsed = time.perf_counter() - started
+
+    logger.info(
+        f"Replayed {handled} messages in {elapsed:.1f}s "
+        f"({handled / elapsed if elapsed else 0.0:.2f} msg/s) | "
+        f"{failures} failed | "
+        f"{outbox.count('send_reply')} replies and "
+        f"{outbox.count('modify_labels')} label changes recorded"
+    )
+    logger.info(rule_report())
+    logger.info(f"Prompt budget | {dict(sorted(budget_stats.items()))}")
+    return outbox
+
+
+def replay(paths: list[str], workers: int = 4, limit: int | None = None) -> RecordingOutbox:
+    return asyncio.run(_replay_async(paths, workers, limit))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay local mbox/.eml mail through ingestion.")
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help=".eml files, mbox files, or directories containing them",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Concurrent processing workers (default: 4)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Stop after this many messages",
+    )
+    args = parser.parse_args()
+
+    replay(args.paths, workers=args.workers, limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
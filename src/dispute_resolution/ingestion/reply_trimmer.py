@@ -0,0 +1,70 @@
+import re
+
+
+# Start of quoted history: everything from here down is dropped
+_QUOTE_START_RES = [
+    # Gmail / Apple Mail: "On Mon, 5 Jan 2026 at 10:02, Rohit <r@x.com> wrote:"
+    # (may be wrapped onto a second line)
+    re.compile(r"^On\s[^\n]{1,200}(?:\n[^\n]{0,100})?\bwrote:[ \t]*$", re.IGNORECASE | re.MULTILINE),
+    # Outlook: "-----Original Message-----"
+    re.compile(r"^-{2,}\s*Original Message\s*-{2,}", re.IGNORECASE | re.MULTILINE),
+    # Outlook: "____" separator or a From:/Sent: header block
+    re.compile(r"^_{10,}[ \t]*$", re.MULTILINE),
+    re.compile(
+        r"^From:[^\n]+\n(?:Sent|Date):[^\n]+\n(?:To|Subject|Cc):",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+]
+
+# Start of a forwarded message: the forwarded text is new to us, so it
+# is kept whole rather than treated as quoted history
+_FORWARD_START_RE = re.compile(
+    r"^-{2,}\s*Forwarded message\s*-{2,}|^Begin forwarded message:",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Start of signature / legal footer: everything from here down is dropped
+_FOOTER_START_RES = [
+    re.compile(r"^--[ \t]*$", re.MULTILINE),
+    re.compile(r"^(?:Sent from my \w+|Get Outlook for \w+)", re.IGNORECASE | re.MULTILINE),
+    re.compile(
+        r"^(?:CONFIDENTIALITY|DISCLAIMER|LEGAL NOTICE)\b"
+        r"|^This (?:e-?mail|message)(?: and any attachments?)?"
+        r" (?:is|are|may be|may contain|contains?) (?:strictly )?(?:confidential|privileged)",
+        re.IGNORECASE | re.MULTILINE,
+    ),
+]
+
+_QUOTED_LINE_RE = re.compile(r"^[ \t]*>.*$\n?", re.MULTILINE)
+
+
+def _cut_at_first(text: str, patterns: list[re.Pattern]) -> str:
+    cut = len(text)
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match and match.start() < cut:
+            cut = match.start()
+    return text[:cut]
+
+
+def trim_reply(body: str) -> str:
+    """
+    Return only the newly written part of an email body.
+
+    Drops quoted history ("On ... wrote:", Outlook separators and header
+    blocks, ">" lines), signatures and legal footers. A forwarded message
+    that is not itself inside quoted history is kept as is. Falls back to
+    the original body if nothing would be left.
+    """
+    text = _cut_at_first(body, _QUOTE_START_RES)
+
+    forwarded = ""
+    forward = _FORWARD_START_RE.search(body)
+    if forward and forward.start() < len(text):
+        text, forwarded = body[:forward.start()], body[forward.start():].strip()
+
+    text = _QUOTED_LINE_RE.sub("", text)
+    text = _cut_at_first(text, _FOOTER_START_RES)
+    text = "\n\n".join(part for part in (text.strip(), forwarded) if part)
+
+    return text or body
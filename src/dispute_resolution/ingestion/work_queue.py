@@ -0,0 +1,191 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from dispute_resolution.config import settings
+from dispute_resolution.models import WorkItem
+
+
+# -------------------------
+# Enqueue
+# -------------------------
+
+async def enqueue_messages(db: AsyncSession, messages: list[dict]) -> int:
+    """
+    Add Gmail messages ({"id", "threadId"}) to the work queue.
+    Messages already queued are ignored. The caller commits.
+    Returns the number of newly queued items.
+    """
+    if not messages:
+        return 0
+
+    result = await db.execute(
+        insert(WorkItem)
+        .values(
+            [
+                {"gmail_message_id": m["id"], "thread_id": m.get("threadId")}
+                for m in messages
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["gmail_message_id"])
+    )
+    return result.rowcount or 0
+
+
+# -------------------------
+# Claim
+# -------------------------
+
+async def claim_work_items(
+    db: AsyncSession,
+    *,
+    worker_id: str,
+    limit: int,
+    lease_seconds: int | None = None,
+) -> list[WorkItem]:
+    """
+    Lease up to ``limit`` items with SELECT ... FOR UPDATE SKIP LOCKED.
+
+    Claimable items are PENDING and due, or LEASED with an expired lease.
+    An item is only claimable if no earlier item of the same Gmail thread
+    is still open, so threads are processed in order across all workers.
+    Commits the lease.
+    """
+    now = datetime.now(timezone.utc)
+    lease_seconds = lease_seconds or settings.WORK_LEASE_SECONDS
+    earlier = aliased(WorkItem)
+
+    stmt = (
+        select(WorkItem)
+        .where(
+            or_(
+                and_(WorkItem.status == "PENDING", WorkItem.available_at <= now),
+                and_(WorkItem.status == "LEASED", WorkItem.lease_expires_at < now),
+            ),
+            ~exists().where(
+                earlier.thread_id == WorkItem.thread_id,
+                earlier.id < WorkItem.id,
+                earlier.status.in_(["PENDING", "LEASED"]),
+            ),
+        )
+        .order_by(WorkItem.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True, of=WorkItem)
+    )
+
+    items = list((await db.execute(stmt)).scalars().all())
+
+    for item in items:
+        item.status = "LEASED"
+        item.lease_owner = worker_id
+        item.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        item.attempts += 1
+        item.updated_at = now
+
+    await db.commit()
+    return items
+
+
+def _leased_by(item_id: int, worker_id: str):
+    # Renewals and outcomes only apply while this worker still holds the lease
+    return and_(
+        WorkItem.id == item_id,
+        WorkItem.lease_owner == worker_id,
+        WorkItem.status == "LEASED",
+    )
+
+
+async def renew_lease(
+    db: AsyncSession,
+    item_id: int,
+    *,
+    worker_id: str,
+    lease_seconds: int | None = None,
+) -> bool:
+    """
+    Extend ``worker_id``'s lease on an item. Returns False if the lease
+    has been lost (expired and claimed by another worker).
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        update(WorkItem)
+        .where(_leased_by(item_id, worker_id))
+        .values(
+            lease_expires_at=now + timedelta(seconds=lease_seconds or settings.WORK_LEASE_SECONDS),
+            updated_at=now,
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+# -------------------------
+# Outcome
+# -------------------------
+
+def retry_delay(attempts: int) -> float:
+    """
+    Jittered exponential backoff shared by the work queue and the outbox.
+    """
+    delay = min(
+        settings.WORK_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.WORK_RETRY_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def complete_work_item(db: AsyncSession, item_id: int, *, worker_id: str) -> bool:
+    """
+    Mark an item DONE. Returns False if ``worker_id`` no longer holds
+    the lease, in which case the item is left to its current owner.
+    """
+    result = await db.execute(
+        update(WorkItem)
+        .where(_leased_by(item_id, worker_id))
+        .values(
+            status="DONE",
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=None,
+            updated_at=datetime.now(timezone.utc),
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
+
+
+async def fail_work_item(
+    db: AsyncSession,
+    item: WorkItem,
+    *,
+    worker_id: str,
+    error: str,
+) -> str | None:
+    """
+    Record a failed attempt. Schedules a retry with exponential backoff,
+    or moves the item to DEAD after WORK_MAX_ATTEMPTS.
+    Returns the new status, or None if ``worker_id`` no longer holds
+    the lease (nothing is changed then).
+    """
+    now = datetime.now(timezone.utc)
+    dead = item.attempts >= settings.WORK_MAX_ATTEMPTS
+    status = "DEAD" if dead else "PENDING"
+
+    result = await db.execute(
+        update(WorkItem)
+        .where(_leased_by(item.id, worker_id))
+        .values(
+            status=status,
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=error[:2000],
+            available_at=now if dead else now + timedelta(seconds=retry_delay(item.attempts)),
+            updated_at=now,
+        )
+    )
+    await db.commit()
+    return status if result.rowcount > 0 else None
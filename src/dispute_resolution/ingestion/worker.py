@@ -0,0 +1,213 @@
+"""
+Work-queue consumer: claims queued Gmail messages and processes them.
+
+Run any number of these, on any number of machines, against one mailbox:
+python -m dispute_resolution.ingestion.worker --concurrency 4
+"""
+
+import asyncio
+import contextlib
+import os
+import socket
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dispute_resolution.config import settings
+from dispute_resolution.database import AsyncSessionLocal
+from dispute_resolution.ingestion.async_gmail import AsyncGmailClient
+from dispute_resolution.ingestion.dispatcher import dispatch_by_key
+from dispute_resolution.ingestion.processor import process_message
+from dispute_resolution.ingestion.work_queue import (
+    claim_work_items,
+    complete_work_item,
+    fail_work_item,
+    renew_lease,
+)
+from dispute_resolution.llm.client import awarm_up
+from dispute_resolution.models import WorkItem
+from dispute_resolution.services.outbox_service import flush_outbox, gmail_outbox
+from dispute_resolution.utils.logging import logger
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+@contextlib.asynccontextmanager
+async def _lease_heartbeat(item: WorkItem, worker_id: str):
+    """
+    Keep renewing the item's lease while it is processed; one email can
+    take several LLM calls, each with retries.
+    """
+    async def _beat() -> None:
+        while True:
+            await asyncio.sleep(settings.WORK_LEASE_SECONDS / 3)
+            async with AsyncSessionLocal() as db:
+                if not await renew_lease(db, item.id, worker_id=worker_id):
+                    logger.warning(f"Lost the lease on work item {item.id}")
+                    return
+
+    task = asyncio.create_task(_beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+async def _process_claimed(
+    gmail: AsyncGmailClient,
+    items: list[WorkItem],
+    *,
+    worker_id: str,
+    concurrency: int,
+) -> None:
+    by_message_id = {item.gmail_message_id: item for item in items}
+    handled: set[str] = set()
+    # Fetch failures are failed below with everything else not handled
+    unfetched: list[str] = []
+
+    async def _handle(db: AsyncSession, msg: dict) -> None:
+        item = by_message_id[msg["id"]]
+        handled.add(msg["id"])
+
+        # Items later in the batch may have waited past the claim's lease
+        if not await renew_lease(db, item.id, worker_id=worker_id):
+            logger.warning(f"Skipping work item {item.id}: lease taken over by another worker")
+            return
+
+        try:
+            async with _lease_heartbeat(item, worker_id):
+                await process_message(db, gmail_outbox, msg)
+        except Exception as e:
+            logger.exception(f"Work item {item.id} failed (attempt {item.attempts})")
+            await db.rollback()
+            status = await fail_work_item(db, item, worker_id=worker_id, error=repr(e))
+            if status is None:
+                logger.warning(f"Work item {item.id} failure not recorded: lease lost")
+            elif status == "DEAD":
+                logger.error(f"Work item {item.id} moved to dead-letter")
+            return
+
+        if not await complete_work_item(db, item.id, worker_id=worker_id):
+            logger.warning(f"Work item {item.id} finished after its lease was lost")
+
+    await dispatch_by_key(
+        gmail.iter_messages(list(by_message_id), unfetched=unfetched),
+        _handle,
+        key=lambda msg: msg.get("threadId"),
+        workers=concurrency,
+    )
+
+    async with AsyncSessionLocal() as db:
+        # Messages Gmail did not return (deleted, or fetch retries exhausted)
+        missing = [item for mid, item in by_message_id.items() if mid not in handled]
+        for item in missing:
+            await fail_work_item(
+                db,
+                item,
+                worker_id=worker_id,
+                error="Message could not be fetched from Gmail",
+            )
+
+        # Deliver queued labels and replies
+        await flush_outbox(db, gmail)
+
+
+async def _run_async(
+    *,
+    worker_id: str,
+    batch_size: int,
+    concurrency: int,
+    idle_seconds: float,
+    once: bool,
+) -> None:
+    logger.info(f"Work-queue worker {worker_id} starting")
+
+    if settings.LLM_WARMUP:
+        await awarm_up()
+
+    async with AsyncGmailClient() as gmail:
+        while True:
+            async with AsyncSessionLocal() as db:
+                items = await claim_work_items(
+                    db,
+                    worker_id=worker_id,
+                    limit=batch_size,
+                )
+
+            if not items:
+                if once:
+                    return
+                await asyncio.sleep(idle_seconds)
+                continue
+
+            logger.info(f"Worker {worker_id} claimed {len(items)} work items")
+            await _process_claimed(
+                gmail,
+                items,
+                worker_id=worker_id,
+                concurrency=concurrency,
+            )
+
+
+def run(
+    *,
+    worker_id: str | None = None,
+    batch_size: int = 20,
+    concurrency: int | None = None,
+    idle_seconds: float = 5.0,
+    once: bool = False,
+) -> None:
+    asyncio.run(
+        _run_async(
+            worker_id=worker_id or _default_worker_id(),
+            batch_size=batch_size,
+            concurrency=concurrency or settings.INGESTION_WORKERS,
+            idle_seconds=idle_seconds,
+            once=once,
+        )
+    )
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Process queued Gmail messages.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=20,
+        help="Work items leased per claim (default: 20)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help=f"Concurrent processors in this worker (default: {settings.INGESTION_WORKERS})",
+    )
+    parser.add_argument(
+        "--idle-seconds",
+        type=float,
+        default=5.0,
+        help="Sleep between claims when the queue is empty (default: 5)",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Exit as soon as the queue is empty",
+    )
+    args = parser.parse_args()
+
+    run(
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        idle_seconds=args.idle_seconds,
+        once=args.once,
+    )
+
+
+if __name__ == "__main__":
+    main()
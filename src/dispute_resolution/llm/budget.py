@@ -0,0 +1,106 @@
+"""
+Prompt token budgeting.
+
+Ollama reserves KV cache for the full ``num_ctx`` of every request and
+reloads the model whenever ``num_ctx`` changes, so each model runs with
+one fixed, right-sized context (LLM_NUM_CTX / INTENT_TRIAGE_NUM_CTX)
+instead of 32k for everything. Inputs that would not fit are cut down to
+their head and tail (the opening usually states the dispute, the end
+carries the latest position) instead of being silently truncated by
+Ollama.
+
+Token counts are a conservative character-based estimate: the served
+models' tokenizers are not available in-process, and over-estimating
+only truncates a little early.
+"""
+
+import math
+from collections import Counter
+from typing import Sequence
+
+from dispute_resolution.utils.logging import logger
+
+
+# calls per num_ctx (num_ctx_<n>) and truncations per label
+budget_stats: Counter = Counter()
+
+OMITTED_MARKER = "\n\n[... {count} {unit} omitted ...]\n\n"
+
+
+def estimate_tokens(text: str, chars_per_token: float) -> int:
+    return math.ceil(len(text) / chars_per_token)
+
+
+def head_tail(
+    text: str,
+    max_tokens: int,
+    *,
+    chars_per_token: float,
+    label: str,
+    head_fraction: float = 0.5,
+) -> str:
+    """
+    Return ``text`` unchanged if it fits ``max_tokens``, otherwise its
+    head and tail joined by an omission marker.
+    """
+    max_chars = int(max_tokens * chars_per_token)
+    if len(text) <= max_chars:
+        return text
+
+    head = int(max_chars * head_fraction)
+    tail = max_chars - head
+    omitted = len(text) - head - tail
+
+    budget_stats[f"truncated_{label}"] += 1
+    logger.warning(
+        f"Truncated {label}: ~{estimate_tokens(text, chars_per_token)} tokens "
+        f"exceeded the {max_tokens}-token budget, kept head and tail "
+        f"({omitted} characters omitted)"
+    )
+    return (
+        text[:head]
+        + OMITTED_MARKER.format(count=omitted, unit="characters")
+        + text[len(text) - tail:]
+    )
+
+
+def join_head_tail(
+    parts: Sequence[str],
+    max_tokens: int,
+    *,
+    separator: str,
+    chars_per_token: float,
+    label: str,
+) -> str:
+    """
+    Join ``parts`` (oldest first), dropping whole parts from the middle
+    when they do not fit: the first part is always kept, then as many of
+    the most recent as the budget allows. A single part that is still
+    too long falls back to head_tail().
+    """
+    joined = separator.join(parts)
+    max_chars = int(max_tokens * chars_per_token)
+    if len(joined) <= max_chars or len(parts) <= 2:
+        return head_tail(joined, max_tokens, chars_per_token=chars_per_token, label=label)
+
+    first, rest = parts[0], parts[1:]
+    used = len(first)
+    recent: list[str] = []
+    for part in reversed(rest):
+        cost = len(separator) + len(part)
+        if recent and used + cost > max_chars:
+            break
+        recent.insert(0, part)
+        used += cost
+
+    omitted = len(rest) - len(recent)
+    if omitted:
+        budget_stats[f"truncated_{label}"] += 1
+        logger.warning(
+            f"Truncated {label}: kept the first and {len(recent)} most recent "
+            f"of {len(parts)} parts to fit {max_tokens} tokens"
+        )
+        first += OMITTED_MARKER.format(count=omitted, unit="messages").rstrip()
+
+    combined = separator.join([first, *recent])
+    return head_tail(combined, max_tokens, chars_per_token=chars_per_token, label=label)
@@ -0,0 +1,152 @@
+"""
+Content-addressed cache for LLM responses, stored in a local SQLite file.
+
+Calls run at temperature 0.0, so the same (model, options, prompt)
+always yields the same answer; reprocessing, re-polls and replays are
+served from here instead of Ollama.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+def cache_key(model: str, options: dict[str, Any], prompt: str) -> str:
+    """
+    sha256 over the model, its sampling options and the exact prompt.
+    """
+    material = json.dumps([model, options, prompt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite-backed response cache with TTL and size-based eviction.
+
+    Entries older than ``ttl_seconds`` are ignored and purged; once more
+    than ``max_entries`` are stored, the least recently used are dropped.
+    Hits only note their access time in memory; it is written in batches
+    with the next put / eviction. Safe to share between threads; async
+    code uses aget() / aput(), which run off the event loop.
+    """
+
+    # Evict at most once per this many writes
+    EVICT_EVERY = 100
+    # Write pending access times once this many hits have accumulated
+    TOUCH_EVERY = 100
+
+    def __init__(self, path: str | Path, *, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        path = Path(path)
+        if str(path) != ":memory:":
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched: dict[str, float] = {}
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_responses_accessed_at "
+            "ON llm_responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._touched[key] = now
+            if len(self._touched) >= self.TOUCH_EVERY:
+                self._flush_touched()
+                self._conn.commit()
+            return response
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._writes += 1
+            self._flush_touched()
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    async def aget(self, key: str) -> str | None:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, response: str) -> None:
+        await asyncio.to_thread(self.put, key, response)
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_responses SET accessed_at = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM llm_responses WHERE created_at < ?",
+            (now - self.ttl_seconds,),
+        )
+        self._conn.execute(
+            """
+            DELETE FROM llm_responses WHERE key IN (
+                SELECT key FROM llm_responses
+                ORDER BY accessed_at DESC
+                LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+
+    def evict(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._evict(time.time())
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
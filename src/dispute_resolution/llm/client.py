@@ -1,16 +1,480 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Any
+
 from langchain_ollama import ChatOllama, OllamaEmbeddings
 from dispute_resolution.config import settings
+from dispute_resolution.llm.budget import budget_stats, head_tail
+from dispute_resolution.llm.cache import LLMCache, cache_key
+from dispute_resolution.llm.embedding_batcher import EmbeddingBatcher
+from dispute_resolution.llm.pool import OllamaPool
+from dispute_resolution.llm.prompts import EMAIL_PREFIX, TASK_HEADER
+from dispute_resolution.utils.llm import JsonObjectScanner, normalize_llm_content
+from dispute_resolution.utils.logging import logger
+
+# Every call goes through the pool; with OLLAMA_BASE_URLS unset it is
+# a single endpoint that still gets the concurrency limit and retries
+pool = OllamaPool(
+    [url.strip() for url in settings.OLLAMA_BASE_URLS.split(",") if url.strip()]
+    or [settings.OLLAMA_BASE_URL],
+    num_parallel=settings.OLLAMA_NUM_PARALLEL,
+    max_retries=settings.OLLAMA_MAX_RETRIES,
+    retry_base_seconds=settings.OLLAMA_RETRY_BASE_SECONDS,
+    failure_threshold=settings.OLLAMA_CIRCUIT_FAILURES,
+    cooldown_seconds=settings.OLLAMA_CIRCUIT_COOLDOWN_SECONDS,
+)
 
 # LLM for reasoning, decisions, summaries
 llm = ChatOllama(
-    base_url=settings.OLLAMA_BASE_URL,   # ✅ supported
+    base_url=pool.endpoints[0].base_url,
     model=settings.LLM_MODEL,            # e.g. "gemma2:27b"
     temperature=0.0,
-    num_ctx=32768,
+    num_ctx=settings.LLM_NUM_CTX,
+    keep_alive=settings.OLLAMA_KEEP_ALIVE_SECONDS,
 )
 
+# Per (endpoint, model, num_ctx) clients, same settings as ``llm``
+_chat_models: dict[tuple[str, str, int], ChatOllama] = {
+    (llm.base_url, llm.model, llm.num_ctx): llm,
+}
+
+
+def chat_model(
+    model: str | None = None,
+    base_url: str | None = None,
+    num_ctx: int | None = None,
+) -> ChatOllama:
+    """
+    Return the chat model named ``model`` (default: LLM_MODEL) on the
+    endpoint ``base_url`` (default: the first one in the pool) with a
+    context of ``num_ctx`` tokens (default: LLM_NUM_CTX).
+    """
+    key = (base_url or llm.base_url, model or llm.model, num_ctx or llm.num_ctx)
+    if key not in _chat_models:
+        _chat_models[key] = ChatOllama(
+            base_url=key[0],
+            model=key[1],
+            temperature=llm.temperature,
+            num_ctx=key[2],
+            keep_alive=llm.keep_alive,
+        )
+    return _chat_models[key]
+
+
+def _num_ctx(model: str | None) -> int:
+    # Fixed per model so Ollama never reloads it between calls
+    if model and model == settings.INTENT_TRIAGE_MODEL:
+        return settings.INTENT_TRIAGE_NUM_CTX
+    return settings.LLM_NUM_CTX
+
+
+def _budget(prompt: str, model: str | None = None) -> tuple[str, int]:
+    """
+    Return the model's num_ctx and the prompt, cut to head + tail if it
+    would not fit in it together with the answer.
+    """
+    num_ctx = _num_ctx(model)
+    prompt = head_tail(
+        prompt,
+        num_ctx - settings.LLM_RESPONSE_TOKENS,
+        chars_per_token=settings.LLM_CHARS_PER_TOKEN,
+        label="prompt",
+    )
+    budget_stats[f"num_ctx_{num_ctx}"] += 1
+    return prompt, num_ctx
+
+
+def _affinity(prompt: str) -> str | None:
+    # Calls sharing the EMAIL_PREFIX part go to the same endpoint
+    shared, found, _ = prompt.partition(TASK_HEADER)
+    return shared if found else None
+
+
 # Embeddings
 embeddings = OllamaEmbeddings(
-    base_url=settings.OLLAMA_BASE_URL,
+    base_url=pool.endpoints[0].base_url,
     model=settings.EMBEDDING_MODEL,      # e.g. "bge-m3"
+    keep_alive=settings.OLLAMA_KEEP_ALIVE_SECONDS,
+)
+
+_embedders: dict[str, OllamaEmbeddings] = {embeddings.base_url: embeddings}
+
+
+def _embedder(base_url: str) -> OllamaEmbeddings:
+    if base_url not in _embedders:
+        _embedders[base_url] = OllamaEmbeddings(
+            base_url=base_url,
+            model=embeddings.model,
+            keep_alive=embeddings.keep_alive,
+        )
+    return _embedders[base_url]
+
+
+# Response cache (LLM_CACHE_ENABLED=false bypasses it entirely)
+llm_cache = (
+    LLMCache(
+        settings.LLM_CACHE_PATH,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    )
+    if settings.LLM_CACHE_ENABLED
+    else None
 )
+
+
+def _cache_key(
+    model: ChatOllama,
+    prompt: str,
+    use_cache: bool,
+    options: dict[str, Any] | None = None,
+) -> str | None:
+    # Only deterministic calls are safe to replay
+    if llm_cache is None or not use_cache or model.temperature != 0.0:
+        return None
+    return cache_key(
+        model.model,
+        {"temperature": model.temperature, "num_ctx": model.num_ctx, **(options or {})},
+        prompt,
+    )
+
+
+def invoke_llm(prompt: str, *, model: str | None = None, use_cache: bool = True) -> str:
+    """
+    Blocking LLM call through the response cache and endpoint pool.
+    Returns the normalized response text.
+    """
+    prompt, num_ctx = _budget(prompt, model)
+    chat = chat_model(model, num_ctx=num_ctx)
+    key = _cache_key(chat, prompt, use_cache)
+    if key:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    response = pool.call(
+        lambda endpoint: chat_model(model, endpoint.base_url, num_ctx).invoke(prompt),
+        affinity=_affinity(prompt),
+    )
+    text = normalize_llm_content(response.content).strip()
+
+    if key:
+        llm_cache.put(key, text)
+    return text
+
+
+async def ainvoke_llm(
+    prompt: str,
+    *,
+    model: str | None = None,
+    timeout: float | None = None,
+    use_cache: bool = True,
+) -> str:
+    """
+    Non-blocking LLM call through the response cache and endpoint pool.
+    Returns the normalized response text. Each attempt is limited to
+    ``timeout`` seconds (default: LLM_TIMEOUT_SECONDS); the last error
+    is raised once retries are exhausted.
+    """
+    prompt, num_ctx = _budget(prompt, model)
+    chat = chat_model(model, num_ctx=num_ctx)
+    key = _cache_key(chat, prompt, use_cache)
+    if key:
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            return cached
+
+    response = await pool.acall(
+        lambda endpoint: chat_model(model, endpoint.base_url, num_ctx).ainvoke(prompt),
+        timeout=timeout or settings.LLM_TIMEOUT_SECONDS,
+        affinity=_affinity(prompt),
+    )
+    text = normalize_llm_content(response.content).strip()
+
+    if key:
+        await llm_cache.aput(key, text)
+    return text
+
+
+# -------------------------
+# Structured (JSON) output
+# -------------------------
+
+# calls / parse_failures / early_stops / cache_hits for JSON-mode calls
+structured_stats: Counter = Counter()
+
+
+def _parse_json_object(text: str) -> dict | None:
+    start = text.find("{")
+    if start != -1:
+        try:
+            # raw_decode ignores anything after the object
+            data, _ = json.JSONDecoder().raw_decode(text, start)
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict):
+            return data
+
+    structured_stats["parse_failures"] += 1
+    logger.warning(
+        f"Structured LLM output did not parse as a JSON object "
+        f"({structured_stats['parse_failures']}/{structured_stats['calls']} calls): "
+        f"{text[:200]!r}"
+    )
+    return None
+
+
+class _ObjectCollector:
+    """
+    Accumulates streamed chunks until the first JSON object closes.
+    """
+
+    def __init__(self):
+        self._scanner = JsonObjectScanner()
+        self._parts: list[str] = []
+        self._end: int | None = None
+
+    def feed(self, chunk) -> bool:
+        """Returns True once the object is complete and the stream can stop."""
+        text = normalize_llm_content(chunk.content)
+        self._parts.append(text)
+        self._end = self._scanner.feed(text)
+        if self._end is not None:
+            structured_stats["early_stops"] += 1
+            return True
+        return False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)[:self._end]
+
+
+def _stream_json(chat: ChatOllama, prompt: str, fmt) -> str:
+    collector = _ObjectCollector()
+    stream = chat.stream(prompt, format=fmt)
+    try:
+        for chunk in stream:
+            if collector.feed(chunk):
+                break
+    finally:
+        # Closing the stream drops the HTTP response, which stops generation
+        stream.close()
+    return collector.text
+
+
+async def _astream_json(chat: ChatOllama, prompt: str, fmt) -> str:
+    collector = _ObjectCollector()
+    stream = chat.astream(prompt, format=fmt)
+    try:
+        async for chunk in stream:
+            if collector.feed(chunk):
+                break
+    finally:
+        await stream.aclose()
+    return collector.text
+
+
+def invoke_json(
+    prompt: str,
+    *,
+    schema: dict | None = None,
+    model: str | None = None,
+    use_cache: bool = True,
+) -> dict | None:
+    """
+    Blocking JSON-mode LLM call. Ollama constrains decoding to JSON
+    (or to ``schema``); tokens are streamed and generation stops as soon
+    as the top-level object closes. Returns the parsed object, or None
+    if the output still does not parse.
+    """
+    fmt = schema if schema is not None else "json"
+    structured_stats["calls"] += 1
+
+    prompt, num_ctx = _budget(prompt, model)
+    chat = chat_model(model, num_ctx=num_ctx)
+    key = _cache_key(chat, prompt, use_cache, {"format": fmt})
+    text = llm_cache.get(key) if key else None
+    if text is not None:
+        structured_stats["cache_hits"] += 1
+        return _parse_json_object(text)
+
+    text = pool.call(
+        lambda endpoint: _stream_json(chat_model(model, endpoint.base_url, num_ctx), prompt, fmt),
+        affinity=_affinity(prompt),
+    )
+    data = _parse_json_object(text)
+    if key and data is not None:
+        llm_cache.put(key, text)
+    return data
+
+
+async def ainvoke_json(
+    prompt: str,
+    *,
+    schema: dict | None = None,
+    model: str | None = None,
+    timeout: float | None = None,
+    use_cache: bool = True,
+) -> dict | None:
+    """
+    Non-blocking invoke_json. Each attempt is limited to ``timeout``
+    seconds (default: LLM_TIMEOUT_SECONDS).
+    """
+    fmt = schema if schema is not None else "json"
+    structured_stats["calls"] += 1
+
+    prompt, num_ctx = _budget(prompt, model)
+    chat = chat_model(model, num_ctx=num_ctx)
+    key = _cache_key(chat, prompt, use_cache, {"format": fmt})
+    text = await llm_cache.aget(key) if key else None
+    if text is not None:
+        structured_stats["cache_hits"] += 1
+        return _parse_json_object(text)
+
+    text = await pool.acall(
+        lambda endpoint: _astream_json(chat_model(model, endpoint.base_url, num_ctx), prompt, fmt),
+        timeout=timeout or settings.LLM_TIMEOUT_SECONDS,
+        affinity=_affinity(prompt),
+    )
+    data = _parse_json_object(text)
+    if key and data is not None:
+        await llm_cache.aput(key, text)
+    return data
+
+
+# Embedding cache, keyed by model + exact text
+embedding_cache = (
+    LLMCache(
+        settings.EMBEDDING_CACHE_PATH,
+        ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    )
+    if settings.EMBEDDING_CACHE_ENABLED
+    else None
+)
+
+async def _aembed_documents(texts: list[str]) -> list[list[float]]:
+    return await pool.acall(
+        lambda endpoint: _embedder(endpoint.base_url).aembed_documents(texts),
+        timeout=settings.EMBEDDING_TIMEOUT_SECONDS,
+    )
+
+
+# Per-attempt timeouts are applied by the pool
+embedding_batcher = EmbeddingBatcher(
+    _aembed_documents,
+    max_batch=settings.EMBEDDING_BATCH_SIZE,
+    window_seconds=settings.EMBEDDING_BATCH_WINDOW_MS / 1000,
+)
+
+
+def _embedding_key(text: str) -> str | None:
+    if embedding_cache is None:
+        return None
+    return cache_key(embeddings.model, {}, text)
+
+
+def _cached_embedding(key: str | None) -> list[float] | None:
+    if key is None:
+        return None
+    cached = embedding_cache.get(key)
+    return json.loads(cached) if cached is not None else None
+
+
+async def _acached_embedding(key: str | None) -> list[float] | None:
+    if key is None:
+        return None
+    cached = await embedding_cache.aget(key)
+    return json.loads(cached) if cached is not None else None
+
+
+def embed_text(text: str) -> list[float]:
+    """
+    Blocking embedding call through the embedding cache.
+    """
+    key = _embedding_key(text)
+    vector = _cached_embedding(key)
+    if vector is not None:
+        return vector
+
+    vector = pool.call(lambda endpoint: _embedder(endpoint.base_url).embed_query(text))
+    if key:
+        embedding_cache.put(key, json.dumps(vector))
+    return vector
+
+
+async def aembed_text(text: str, *, timeout: float | None = None) -> list[float]:
+    """
+    Non-blocking embedding call through the embedding cache.
+    Misses are micro-batched with other concurrent requests into one
+    embed_documents call on the pool. ``timeout`` bounds the whole call
+    including retries (default: only the per-attempt
+    EMBEDDING_TIMEOUT_SECONDS applies).
+    """
+    key = _embedding_key(text)
+    vector = await _acached_embedding(key)
+    if vector is not None:
+        return vector
+
+    vector = await asyncio.wait_for(
+        embedding_batcher.embed(text),
+        timeout=timeout,
+    )
+    if key:
+        await embedding_cache.aput(key, json.dumps(vector))
+    return vector
+
+
+# -------------------------
+# Warm-up
+# -------------------------
+
+async def _warm(label: str, base_url: str, call) -> None:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(call, timeout=settings.LLM_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"Warm-up of {label} on {base_url} failed: {e!r}")
+        return
+    logger.info(f"Warmed up {label} on {base_url} in {time.perf_counter() - started:.1f}s")
+
+
+def _warm_up_model(model: str, base_url: str) -> ChatOllama:
+    # Same num_ctx as real calls (a different one would reload the model);
+    # one output token is enough to load it and cache the prompt
+    return ChatOllama(
+        base_url=base_url,
+        model=model,
+        temperature=llm.temperature,
+        num_ctx=_num_ctx(model),
+        num_predict=1,
+        keep_alive=llm.keep_alive,
+    )
+
+
+async def awarm_up() -> None:
+    """
+    Load LLM_MODEL, INTENT_TRIAGE_MODEL (if set) and the embedding model
+    on every endpoint, so the first email after startup does not pay the
+    model load. Each model is loaded with the num_ctx its real calls use.
+    The chat prompt is the shared EMAIL_PREFIX preamble, which leaves that
+    prefix cached. Failures are logged; the pool's retries cover the
+    first real call.
+    """
+    prompt = EMAIL_PREFIX.format(subject="", body="") + TASK_HEADER
+    models = [llm.model]
+    if settings.INTENT_TRIAGE_MODEL:
+        models.append(settings.INTENT_TRIAGE_MODEL)
+
+    await asyncio.gather(
+        *(
+            _warm(model, endpoint.base_url, _warm_up_model(model, endpoint.base_url).ainvoke(prompt))
+            for endpoint in pool.endpoints
+            for model in models
+        ),
+        *(
+            _warm(embeddings.model, endpoint.base_url, _embedder(endpoint.base_url).aembed_documents(["warm-up"]))
+            for endpoint in pool.endpoints
+        ),
+    )
@@ -0,0 +1,81 @@
+"""
+Async micro-batcher for embedding requests.
+
+Concurrent ``embed()`` calls made within a short window are sent as one
+``embed_documents`` request, so the embedding model runs batched and
+the HTTP round trip is paid once per batch instead of once per text.
+"""
+
+import asyncio
+from typing import Awaitable, Callable
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts for up to ``window_seconds`` (or until ``max_batch``
+    are waiting) and embeds them with a single ``embed_documents`` call.
+    Duplicate texts in a batch are embedded once.
+    """
+
+    def __init__(
+        self,
+        embed_documents: Callable[[list[str]], Awaitable[list[list[float]]]],
+        *,
+        max_batch: int = 32,
+        window_seconds: float = 0.01,
+        timeout: float | None = None,
+    ):
+        self._embed_documents = embed_documents
+        self.max_batch = max_batch
+        self.window_seconds = window_seconds
+        self.timeout = timeout
+
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        # Keep a reference until done so the task is not garbage-collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+
+        try:
+            vectors = await asyncio.wait_for(
+                self._embed_documents(texts),
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, vectors))
+        for text, future in batch:
+            # A caller that timed out has already cancelled its future
+            if not future.done():
+                future.set_result(by_text[text])
@@ -0,0 +1,235 @@
+"""
+Client-side load balancing over several Ollama servers.
+
+Each request goes to the healthy endpoint with the fewest outstanding
+requests; a per-endpoint semaphore keeps at most ``num_parallel`` in
+flight (match the server's OLLAMA_NUM_PARALLEL so nothing queues
+inside Ollama where we cannot see it). Failed calls are retried on
+another endpoint with jittered backoff, and an endpoint that keeps
+failing is taken out of rotation for ``cooldown_seconds`` before a
+single probe request is let through again.
+
+Calls may pass an ``affinity`` key (the prompt prefix they share with
+other calls); while its preferred endpoint has a free slot those calls
+land on the same node and reuse its prompt cache.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import zlib
+from typing import Awaitable, Callable, TypeVar
+
+from dispute_resolution.utils.logging import logger
+
+T = TypeVar("T")
+
+
+class OllamaUnavailableError(RuntimeError):
+    """Every endpoint's circuit is open."""
+
+
+class Endpoint:
+    """
+    One Ollama server: its concurrency limit and circuit-breaker state.
+    All state changes happen under the owning pool's lock.
+    """
+
+    def __init__(self, base_url: str, *, num_parallel: int):
+        self.base_url = base_url
+        # Requests routed here, including those waiting for a slot
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+
+        # Separate limits for the async pipeline and the blocking twins
+        self.async_slots = asyncio.Semaphore(num_parallel)
+        self.sync_slots = threading.BoundedSemaphore(num_parallel)
+
+    def accepts(self, now: float, cooldown_seconds: float) -> bool:
+        if self.opened_at is None:
+            return True
+        # Half-open: one probe at a time once the cooldown has passed
+        return now - self.opened_at >= cooldown_seconds and not self.probing
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.base_url!r}, outstanding={self.outstanding})"
+
+
+def _is_client_error(exc: BaseException) -> bool:
+    # ollama.ResponseError / httpx errors carry the HTTP status; a 4xx
+    # (unknown model, bad request) fails the same way on every node
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status != 429
+
+
+class OllamaPool:
+    def __init__(
+        self,
+        base_urls: list[str],
+        *,
+        num_parallel: int = 4,
+        max_retries: int = 2,
+        retry_base_seconds: float = 0.5,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+    ):
+        if not base_urls:
+            raise ValueError("OllamaPool needs at least one base URL")
+
+        self.endpoints = [Endpoint(url, num_parallel=num_parallel) for url in base_urls]
+        self.num_parallel = num_parallel
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Routing + circuit state
+    # -------------------------
+
+    def _acquire(self, tried: set[str], affinity: str | None = None) -> Endpoint:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                e for e in self.endpoints
+                if e.accepts(now, self.cooldown_seconds)
+            ]
+            if not candidates:
+                raise OllamaUnavailableError(
+                    f"All {len(self.endpoints)} Ollama endpoints are circuit-open"
+                )
+
+            # Prefer a node this request has not failed on yet
+            fresh = [e for e in candidates if e.base_url not in tried] or candidates
+            endpoint = min(fresh, key=lambda e: e.outstanding)
+
+            if affinity is not None:
+                # Rendezvous hashing: stable while other nodes come and go
+                key = zlib.crc32(affinity.encode("utf-8"))
+                preferred = max(
+                    fresh,
+                    key=lambda e: zlib.crc32(e.base_url.encode("utf-8"), key),
+                )
+                if preferred.outstanding < self.num_parallel:
+                    endpoint = preferred
+
+            if endpoint.opened_at is not None:
+                endpoint.probing = True
+            endpoint.outstanding += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, healthy: bool | None) -> None:
+        """``healthy`` is None when the call neither proved nor disproved anything."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            was_probing, endpoint.probing = endpoint.probing, False
+
+            if healthy:
+                if endpoint.opened_at is not None:
+                    logger.info(f"Ollama endpoint {endpoint.base_url} recovered, closing circuit")
+                endpoint.consecutive_failures = 0
+                endpoint.opened_at = None
+            elif healthy is False:
+                endpoint.consecutive_failures += 1
+                if was_probing or endpoint.consecutive_failures >= self.failure_threshold:
+                    if endpoint.opened_at is None or was_probing:
+                        logger.warning(
+                            f"Ollama endpoint {endpoint.base_url} failed "
+                            f"{endpoint.consecutive_failures} times, opening circuit "
+                            f"for {self.cooldown_seconds:.0f}s"
+                        )
+                    endpoint.opened_at = time.monotonic()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter so retries from concurrent requests spread out
+        return random.uniform(0, self.retry_base_seconds * 2 ** attempt)
+
+    # -------------------------
+    # Calls
+    # -------------------------
+
+    def call(self, fn: Callable[[Endpoint], T], *, affinity: str | None = None) -> T:
+        """
+        Run blocking ``fn(endpoint)`` with routing, retries and circuit
+        breaking. Raises the last error once retries are exhausted.
+        """
+        tried: set[str] = set()
+        for attempt in range(self.max_retries + 1):
+            try:
+                endpoint = self._acquire(tried, affinity)
+            except OllamaUnavailableError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            healthy: bool | None = None
+            try:
+                with endpoint.sync_slots:
+                    result = fn(endpoint)
+                healthy = True
+                return result
+            except Exception as e:
+                if _is_client_error(e):
+                    healthy = True
+                    raise
+                healthy = False
+                tried.add(endpoint.base_url)
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Ollama call to {endpoint.base_url} failed ({e!r}), retrying")
+            finally:
+                self._release(endpoint, healthy)
+
+            time.sleep(self._backoff(attempt))
+
+        raise AssertionError("unreachable")
+
+    async def acall(
+        self,
+        fn: Callable[[Endpoint], Awaitable[T]],
+        *,
+        timeout: float | None = None,
+        affinity: str | None = None,
+    ) -> T:
+        """
+        Await ``fn(endpoint)`` with routing, retries and circuit breaking.
+        ``timeout`` applies per attempt; a timed-out attempt counts as an
+        endpoint failure and is retried like any other.
+        """
+        tried: set[str] = set()
+        for attempt in range(self.max_retries + 1):
+            try:
+                endpoint = self._acquire(tried, affinity)
+            except OllamaUnavailableError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            healthy: bool | None = None
+            try:
+                async with endpoint.async_slots:
+                    result = await asyncio.wait_for(fn(endpoint), timeout=timeout)
+                healthy = True
+                return result
+            except Exception as e:
+                if _is_client_error(e):
+                    healthy = True
+                    raise
+                healthy = False
+                tried.add(endpoint.base_url)
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Ollama call to {endpoint.base_url} failed ({e!r}), retrying")
+            finally:
+                # Cancellation leaves healthy=None: no verdict on the node
+                self._release(endpoint, healthy)
+
+            await asyncio.sleep(self._backoff(attempt))
+
+        raise AssertionError("unreachable")
@@ -1,7 +1,23 @@
-INTENT_CLASSIFICATION_PROMPT = """
-You are an accounts-payable analyst assisting an automated dispute resolution system.
+# Every per-email prompt starts with EMAIL_PREFIX and only then states
+# its task. The intent, fact, decision and summary calls for one email
+# therefore share the longest possible prompt prefix, which Ollama keeps
+# in the KV cache and does not evaluate again. Keep anything that varies
+# per task (instructions, schemas, candidate disputes) after TASK_HEADER.
+EMAIL_PREFIX = """
+You are an accounts-payable analyst assisting an automated supplier dispute resolution system.
+Work only from the email below. Do NOT invent facts.
 
-Your task is to classify the email into one of the following intents:
+EMAIL:
+Subject: {subject}
+Body:
+{body}
+"""
+
+TASK_HEADER = "\n=== TASK ===\n"
+
+
+INTENT_CLASSIFICATION_PROMPT = EMAIL_PREFIX + TASK_HEADER + """
+Classify the email into one of the following intents:
 
 INTENT DEFINITIONS:
 - DISPUTE:
@@ -26,11 +42,6 @@ IMPORTANT RULES:
 - Do NOT assume intent or missing information.
 - This classification does NOT decide dispute validity.
 
-EMAIL:
-Subject: {subject}
-Body:
-{body}
-
 Respond ONLY in JSON:
 {{
   "intent": "DISPUTE | AMBIGUOUS | NOT_DISPUTE",
@@ -40,10 +51,8 @@ Respond ONLY in JSON:
 """
 
 
-FACT_EXTRACTION_PROMPT = """
-You are an information extraction system for supplier dispute emails.
-
-Your task is to extract structured dispute-related facts from the email.
+FACT_EXTRACTION_PROMPT = EMAIL_PREFIX + TASK_HEADER + """
+Extract structured dispute-related facts from the email.
 You must NOT decide whether this is a dispute.
 You must NOT generate clarification text.
 You must NOT infer or guess missing information.
@@ -55,22 +64,87 @@ Rules:
 - Return ONLY valid JSON.
 - Follow the schema EXACTLY.
 
+Confidence rules:
+- 0.9–1.0: Explicitly stated
+- 0.6–0.8: Clearly implied
+- 0.3–0.5: Weak signal
+- <0.3: Avoid unless unavoidable
+
 Schema:
 {schema}
+"""
 
-EMAIL SUBJECT:
-{subject}
 
-EMAIL BODY:
-{body}
 
-Confidence rules:
+# Issue + requested action only; identifiers and amounts are found
+# deterministically (services/fact_patterns.py) before this runs
+ISSUE_ACTION_PROMPT = EMAIL_PREFIX + TASK_HEADER + """
+From the email, extract ONLY the issue and the requested action.
+- issue.category: OVERCHARGE | SHORT_PAYMENT | DUPLICATE | TAX | UNKNOWN
+- issue.description: one short sentence, only what the email states
+- requested_action.type: REVISED_INVOICE | PAYMENT | CREDIT_NOTE | CLARIFICATION | UNKNOWN
+Use UNKNOWN when the email does not say. Do NOT infer or guess.
+
+Respond ONLY in JSON:
+{{
+  "issue": {{"category": "...", "description": "..."}},
+  "requested_action": {{"type": "..."}},
+  "confidence": {{"issue.category": 0.0, "requested_action.type": 0.0}}
+}}
+"""
+
+
+# Single-call intent classification + fact extraction
+# (used when FUSED_INTENT_EXTRACTION is enabled)
+INTENT_AND_FACTS_PROMPT = EMAIL_PREFIX + TASK_HEADER + """
+You have TWO tasks for the email above, answered in ONE JSON object.
+
+TASK 1 — INTENT
+Classify the email into one of:
+- DISPUTE:
+  The email clearly raises a billing, invoice, payment, tax, or credit-related issue
+  and provides enough signal that a dispute process should begin.
+- AMBIGUOUS:
+  The email references an invoice, payment, or issue but does NOT clearly explain
+  the problem, the discrepancy, or the requested action.
+- NOT_DISPUTE:
+  Greetings, acknowledgements, status updates, scheduling, or non-financial communication.
+
+Intent confidence rules:
+- 0.85–1.0 → clear and explicit dispute
+- 0.60–0.84 → partial or unclear information (usually AMBIGUOUS)
+- < 0.60 → weak or non-dispute signal
+
+Be conservative; avoid false positives. If an invoice number is mentioned
+but the issue is unclear, classify as AMBIGUOUS.
+
+TASK 2 — FACTS
+Extract structured dispute-related facts, whatever the intent.
+- If a value is not explicitly stated, use null or UNKNOWN.
+- Do NOT perform calculations.
+- Do NOT infer or guess missing information.
+- Follow the schema EXACTLY.
+
+Fact confidence rules:
 - 0.9–1.0: Explicitly stated
 - 0.6–0.8: Clearly implied
 - 0.3–0.5: Weak signal
 - <0.3: Avoid unless unavoidable
-"""
 
+Facts schema:
+{schema}
+
+Respond ONLY in JSON:
+{{
+  "intent": "DISPUTE | AMBIGUOUS | NOT_DISPUTE",
+  "confidence_score": 0.0 to 1.0,
+  "reason": "short explanation",
+  "facts": {{ ... facts schema "facts" object ... }},
+  "confidence": {{ ... }},
+  "missing_fields": [],
+  "evidence": {{ ... }}
+}}
+"""
 
 
 # Prompt for clarification email
@@ -109,11 +183,8 @@ Write ONLY the email body text. No headers. No salutations. No signature.
 """
 
 # Prompt for deciding: attach to existing dispute or create new
-DECISION_PROMPT = """
-You are an expert accounts-payable dispute analyst.
-
-Your task:
-Decide whether the NEW EMAIL belongs to one of the EXISTING DISPUTES.
+DECISION_PROMPT = EMAIL_PREFIX + TASK_HEADER + """
+Decide whether the EMAIL above belongs to one of the EXISTING DISPUTES.
 
 Rules:
 - If the email is a continuation of the same issue (same invoice, same amounts, same problem), choose MATCH.
@@ -125,11 +196,6 @@ Rules:
 EXISTING DISPUTES:
 {disputes}
 
-NEW EMAIL:
-Subject: {subject}
-Body:
-{body}
-
 Respond ONLY in valid JSON with this schema:
 {{
   "action": "MATCH" or "NEW",
@@ -141,10 +207,8 @@ Respond ONLY in valid JSON with this schema:
 
 
 # Prompt for dispute summary generation
-SUMMARY_PROMPT = """
-You are an accounts-payable analyst.
-
-Write a concise dispute summary (2–4 sentences) based on the email below.
+SUMMARY_PROMPT = EMAIL_PREFIX + TASK_HEADER + """
+Write a concise dispute summary (2–4 sentences) based on the email above.
 Focus on:
 - the issue type
 - invoice number (if present)
@@ -152,11 +216,6 @@ Focus on:
 - what action is requested
 
 Do NOT invent information.
-
-EMAIL:
-Subject: {subject}
-Body:
-{body}
 """
 
 
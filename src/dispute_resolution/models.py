@@ -3,9 +3,11 @@ from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     DateTime,
     ForeignKey,
+    Integer,
     Text,
     Float,
 )
@@ -46,6 +48,13 @@ class Supplier(Base):
         unique=True,
     )
 
+    # Supplier-specific identifier regexes, keyed like
+    # facts["commercial_identifiers"] (e.g. {"invoice_numbers": [...]})
+    identifier_patterns: Mapped[Optional[Dict[str, List[str]]]] = mapped_column(
+        JSONB,
+        nullable=True,
+    )
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -147,6 +156,9 @@ class Email(Base):
     subject: Mapped[str] = mapped_column(Text, nullable=False)
     body: Mapped[str] = mapped_column(Text, nullable=False)
 
+    # Reply text with quoted history, signatures and footers removed
+    new_content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
     embedding: Mapped[Optional[list[float]]] = mapped_column(
         Vector(1024),
         nullable=True,
@@ -178,6 +190,10 @@ class Email(Base):
     intent_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     intent_confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
 
+    # Intent cascade: DIRECT | TRIAGE | ESCALATED, and the triage model's confidence
+    intent_route: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    intent_triage_confidence: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
     # -----------------------------
     # Clarification
     # -----------------------------
@@ -207,6 +223,16 @@ class Email(Base):
         nullable=True,
     )
 
+    # -----------------------------
+    # Pipeline timings
+    # -----------------------------
+
+    # {stage: milliseconds} recorded by resolve_email
+    stage_timings: Mapped[Optional[Dict[str, float]]] = mapped_column(
+        JSONB,
+        nullable=True,
+    )
+
     # -----------------------------
     # Relationships
     # -----------------------------
@@ -245,6 +271,164 @@ class ProcessedGmailMessage(Base):
     )
 
 
+# =================================================
+# Ingestion Checkpoints
+# =================================================
+
+class IngestionCheckpoint(Base):
+    __tablename__ = "ingestion_checkpoints"
+
+    name: Mapped[str] = mapped_column(
+        Text,
+        primary_key=True,
+    )
+
+    value: Mapped[Optional[str]] = mapped_column(
+        Text,
+        nullable=True,
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+# =================================================
+# Work Queue
+# =================================================
+
+class WorkItem(Base):
+    __tablename__ = "work_items"
+
+    # Monotonic ID doubles as enqueue order (per-thread FIFO)
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    gmail_message_id: Mapped[str] = mapped_column(
+        Text,
+        unique=True,
+        nullable=False,
+    )
+
+    thread_id: Mapped[Optional[str]] = mapped_column(
+        Text,
+        index=True,
+        nullable=True,
+    )
+
+    status: Mapped[str] = mapped_column(
+        Text,
+        default="PENDING",
+        index=True,
+        nullable=False,   # PENDING | LEASED | DONE | DEAD
+    )
+
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    lease_owner: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+# =================================================
+# Gmail Outbox
+# =================================================
+
+class OutboxItem(Base):
+    __tablename__ = "outbox_items"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    kind: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,   # LABELS | REPLY
+    )
+
+    gmail_message_id: Mapped[str] = mapped_column(
+        Text,
+        index=True,
+        nullable=False,
+    )
+
+    payload: Mapped[Dict[str, Any]] = mapped_column(
+        JSONB,
+        nullable=False,
+    )
+
+    status: Mapped[str] = mapped_column(
+        Text,
+        default="PENDING",
+        index=True,
+        nullable=False,   # PENDING | LEASED | SENT | DEAD
+    )
+
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    lease_owner: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    sent_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+
 
 class Case(Base):
     __tablename__ = "cases"
@@ -1,12 +1,18 @@
 from typing import Dict, List, Any
 import json
 
-from dispute_resolution.llm.client import llm
-from dispute_resolution.utils.llm import normalize_llm_content
+from dispute_resolution.llm.client import ainvoke_llm, invoke_llm
 from dispute_resolution.utils.logging import logger
 from dispute_resolution.llm.prompts import CLARIFICATION_PROMPT
 
 
+def _build_prompt(known_facts: Dict[str, Any], missing_fields: List[str]) -> str:
+    return CLARIFICATION_PROMPT.format(
+        known_facts=json.dumps(known_facts, indent=2),
+        missing_fields=json.dumps(missing_fields, indent=2),
+    )
+
+
 def build_clarification_email(
     *,
     known_facts: Dict[str, Any],
@@ -21,12 +27,24 @@ def build_clarification_email(
         logger.warning("Clarification requested but no missing fields provided")
         return ""
 
-    prompt = CLARIFICATION_PROMPT.format(
-        known_facts=json.dumps(known_facts, indent=2),
-        missing_fields=json.dumps(missing_fields, indent=2),
-    )
+    logger.info("Generating intelligent clarification email")
+
+    return invoke_llm(_build_prompt(known_facts, missing_fields))
+
+
+async def abuild_clarification_email(
+    *,
+    known_facts: Dict[str, Any],
+    missing_fields: List[str],
+) -> str:
+    """
+    Async build_clarification_email; does not block the event loop.
+    """
+
+    if not missing_fields:
+        logger.warning("Clarification requested but no missing fields provided")
+        return ""
 
     logger.info("Generating intelligent clarification email")
 
-    response = llm.invoke(prompt)
-    return normalize_llm_content(response.content).strip()
+    return await ainvoke_llm(_build_prompt(known_facts, missing_fields))
@@ -1,10 +1,22 @@
 import json
 from typing import List, Dict, Any, Optional
 
-from dispute_resolution.llm.client import llm
+from dispute_resolution.config import settings
+from dispute_resolution.llm.client import ainvoke_json, ainvoke_llm, invoke_json, invoke_llm
 from dispute_resolution.llm.prompts import DECISION_PROMPT
 from dispute_resolution.utils.logging import logger
-from dispute_resolution.utils.llm import normalize_llm_content
+
+
+# Ollama output schema for STRUCTURED_LLM_OUTPUT
+DECISION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": ["MATCH", "NEW"]},
+        "dispute_id": {"type": ["string", "null"]},
+        "reason": {"type": "string"},
+    },
+    "required": ["action", "dispute_id", "reason"],
+}
 
 
 # --------------------------------------------------
@@ -35,28 +47,13 @@ def _invoice_overlap(
     return any(inv.lower() in summary for inv in invoices)
 
 
-# --------------------------------------------------
-# Public API
-# --------------------------------------------------
-
-def decide_dispute(
-    *,
-    subject: str,
-    body: str,
+def _pre_decide(
     extracted_facts: Dict[str, Any],
     candidate_disputes: List[Dict[str, Any]],
-) -> Dict[str, Any]:
+) -> Optional[Dict[str, Any]]:
     """
-    Decide whether the email matches an existing dispute or is a new one.
-
-    Returns:
-    {
-      "action": "MATCH" | "NEW",
-      "dispute_id": "<uuid or None>",
-      "reason": "<explainable reason>"
-    }
+    Decisions that need no LLM: no candidates, or a hard invoice match.
     """
-
     if not candidate_disputes:
         return {
             "action": "NEW",
@@ -75,6 +72,14 @@ def decide_dispute(
                 "reason": "Invoice number matches existing dispute",
             }
 
+    return None
+
+
+def _build_prompt(
+    subject: str,
+    body: str,
+    candidate_disputes: List[Dict[str, Any]],
+) -> str:
     # =================================================
     # 2. FACT-BASED LLM TIE-BREAKER (SAFE)
     # =================================================
@@ -86,21 +91,32 @@ def decide_dispute(
     for d in candidate_disputes
 ]
     
-    prompt = DECISION_PROMPT.format(
+    return DECISION_PROMPT.format(
     disputes=json.dumps(safe_candidates, indent=2),
     subject=subject,
     body=body
     )
 
-    logger.info("Calling LLM decision tie-breaker")
 
-    response = llm.invoke(prompt)
-    raw = normalize_llm_content(response.content).strip()
+def _parse_decision(
+    raw: str,
+    candidate_disputes: List[Dict[str, Any]],
+) -> Dict[str, Any]:
     clean = _extract_json(raw)
 
     try:
         decision = json.loads(clean)
     except json.JSONDecodeError:
+        decision = None
+
+    return _validate_decision(decision, candidate_disputes)
+
+
+def _validate_decision(
+    decision: Dict[str, Any] | None,
+    candidate_disputes: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    if not isinstance(decision, dict):
         logger.error("LLM decision JSON parse failed")
         return {
             "action": "NEW",
@@ -130,3 +146,61 @@ def decide_dispute(
         "dispute_id": None,
         "reason": "No strong factual match with existing disputes",
     }
+
+
+# --------------------------------------------------
+# Public API
+# --------------------------------------------------
+
+def decide_dispute(
+    *,
+    subject: str,
+    body: str,
+    extracted_facts: Dict[str, Any],
+    candidate_disputes: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Decide whether the email matches an existing dispute or is a new one.
+
+    Returns:
+    {
+      "action": "MATCH" | "NEW",
+      "dispute_id": "<uuid or None>",
+      "reason": "<explainable reason>"
+    }
+    """
+    decision = _pre_decide(extracted_facts, candidate_disputes)
+    if decision:
+        return decision
+
+    logger.info("Calling LLM decision tie-breaker")
+
+    prompt = _build_prompt(subject, body, candidate_disputes)
+    if settings.STRUCTURED_LLM_OUTPUT:
+        return _validate_decision(invoke_json(prompt, schema=DECISION_SCHEMA), candidate_disputes)
+    return _parse_decision(invoke_llm(prompt), candidate_disputes)
+
+
+async def adecide_dispute(
+    *,
+    subject: str,
+    body: str,
+    extracted_facts: Dict[str, Any],
+    candidate_disputes: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """
+    Async decide_dispute; does not block the event loop.
+    """
+    decision = _pre_decide(extracted_facts, candidate_disputes)
+    if decision:
+        return decision
+
+    logger.info("Calling LLM decision tie-breaker")
+
+    prompt = _build_prompt(subject, body, candidate_disputes)
+    if settings.STRUCTURED_LLM_OUTPUT:
+        return _validate_decision(
+            await ainvoke_json(prompt, schema=DECISION_SCHEMA),
+            candidate_disputes,
+        )
+    return _parse_decision(await ainvoke_llm(prompt), candidate_disputes)
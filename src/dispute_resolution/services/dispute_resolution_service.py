@@ -1,35 +1,94 @@
+import asyncio
+import time
+from typing import Any, Awaitable
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from dispute_resolution.models import Email, Dispute
-from dispute_resolution.services.intent_service import classify_intent
-from dispute_resolution.services.fact_extraction_service import extract_facts
-from dispute_resolution.services.clarification_service import build_clarification_email
-from dispute_resolution.services.embedding_service import embed_email
+from dispute_resolution.config import settings
+from dispute_resolution.models import Email, Dispute, Supplier
+from dispute_resolution.services.intent_service import aclassify_intent
+from dispute_resolution.services.fact_extraction_service import aextract_facts
+from dispute_resolution.services.intent_extraction_service import aclassify_and_extract
+from dispute_resolution.services.intent_rules import pre_classify, record_shadow
+from dispute_resolution.services.clarification_service import abuild_clarification_email
+from dispute_resolution.services.embedding_service import aembed_email
 from dispute_resolution.services.vector_search_service import find_candidate_disputes
-from dispute_resolution.services.decision_service import decide_dispute
+from dispute_resolution.services.decision_service import adecide_dispute
 from dispute_resolution.services.summary_service import (
-    generate_dispute_summary,
+    agenerate_dispute_summary,
     resummarize_dispute,
 )
 from dispute_resolution.services.thread_service import get_thread_context
-from dispute_resolution.services.reply_service import send_reply, build_reply_subject
+from dispute_resolution.services.reply_service import build_reply_payload, build_reply_subject
+from dispute_resolution.services.outbox_service import GmailOutbox
 from dispute_resolution.services.case_service import (
     get_open_intake_case_by_thread,
     create_intake_case,
     mark_intake_waiting,
     promote_intake_to_dispute
 )
+from dispute_resolution.utils.logging import logger
+
+
+async def _timed(timings: dict[str, float], stage: str, aw: Awaitable[Any]) -> Any:
+    """
+    Await ``aw`` and record its wall time in milliseconds under ``stage``.
+    """
+    started = time.perf_counter()
+    try:
+        return await aw
+    finally:
+        timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def _concurrently(*aws: Awaitable[Any]) -> list[Any]:
+    """
+    Await ``aws`` concurrently and return their results in order. If one
+    fails, the others are cancelled (releasing their pool slots) and its
+    error is raised as is.
+    """
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(aw) for aw in aws]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+    return [task.result() for task in tasks]
+
+
+async def _speculative_embed(subject: str, body: str) -> list[float] | None:
+    """
+    Embed before intent is known. A failure here is not fatal: the
+    dispute path embeds again if needed, the other paths never use it.
+    """
+    try:
+        return await aembed_email(subject=subject, body=body)
+    except Exception:
+        logger.exception("Speculative embedding failed")
+        return None
+
+
+def _record_timings(email: Email, timings: dict[str, float], started: float) -> None:
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    # Fresh dict so the JSONB column is flagged dirty
+    email.stage_timings = dict(timings)
+    logger.info(f"Email {email.gmail_message_id} stage timings (ms): {timings}")
 
 
 async def resolve_email(
     *,
     db: AsyncSession,
     email: Email,
-    gmail_service,
+    outbox: GmailOutbox,
     sender: str,
+    headers: dict[str, str] | None = None,
 ) -> dict | None:
     """
+    Gmail side effects (clarification replies) are written to ``outbox``
+    in the same transaction as the state change they belong to.
+    ``headers`` (auto-reply / content-type headers) feed the rule-based
+    intent pre-classifier.
+
     Returns:
     - MATCH
     - NEW
@@ -63,36 +122,103 @@ async def resolve_email(
                 "reason": "Thread already linked to dispute",
             }
 
+    # Prompts only see the newly written text, not the quoted history
+    body = email.new_content or email.body
+
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+
+    # Supplier-specific identifier formats (already in the session)
+    supplier = await db.get(Supplier, email.supplier_id)
+    supplier_patterns = supplier.identifier_patterns if supplier else None
+
+    # =================================================
+    # 0b. RULE-BASED PRE-CLASSIFIER (no LLM)
+    # =================================================
+    rule_intent = None
+    if settings.INTENT_RULES_MODE != "off":
+        rule_intent = pre_classify(email.subject, body, headers)
+
     # =================================================
     # 1. INTENT CLASSIFICATION
+    # 2. FACT EXTRACTION (always, except rule/cascade NOT_DISPUTE)
+    # + speculative embedding, all concurrently
     # =================================================
-    intent = classify_intent(
-        subject=email.subject,
-        body=email.body,
-    )
+    if rule_intent and settings.INTENT_RULES_MODE == "on":
+        intent = rule_intent
+        extraction = None
+        speculative_embedding = None
+        if intent["intent"] == "DISPUTE":
+            extraction, speculative_embedding = await _concurrently(
+                _timed(timings, "facts", aextract_facts(
+                    subject=email.subject,
+                    body=body,
+                    supplier_patterns=supplier_patterns,
+                )),
+                _timed(timings, "embed", _speculative_embed(email.subject, body)),
+            )
+    elif settings.FUSED_INTENT_EXTRACTION:
+        # One prompt, one pass over the email
+        (intent, extraction), speculative_embedding = await _concurrently(
+            _timed(timings, "intent_and_facts", aclassify_and_extract(
+                subject=email.subject,
+                body=body,
+                supplier_patterns=supplier_patterns,
+            )),
+            _timed(timings, "embed", _speculative_embed(email.subject, body)),
+        )
+    elif settings.INTENT_TRIAGE_MODEL:
+        # Cascade: settle intent first so emails the triage model calls
+        # NOT_DISPUTE never reach LLM_MODEL for extraction either
+        intent, speculative_embedding = await _concurrently(
+            _timed(timings, "intent", aclassify_intent(
+                subject=email.subject,
+                body=body,
+            )),
+            _timed(timings, "embed", _speculative_embed(email.subject, body)),
+        )
+        extraction = None
+        if intent["intent"] != "NOT_DISPUTE":
+            extraction = await _timed(timings, "facts", aextract_facts(
+                subject=email.subject,
+                body=body,
+                supplier_patterns=supplier_patterns,
+            ))
+    else:
+        intent, extraction, speculative_embedding = await _concurrently(
+            _timed(timings, "intent", aclassify_intent(
+                subject=email.subject,
+                body=body,
+            )),
+            _timed(timings, "facts", aextract_facts(
+                subject=email.subject,
+                body=body,
+                supplier_patterns=supplier_patterns,
+            )),
+            _timed(timings, "embed", _speculative_embed(email.subject, body)),
+        )
+
+    if rule_intent and settings.INTENT_RULES_MODE == "shadow":
+        record_shadow(rule_intent, intent)
 
     email.intent_status = intent["intent"]
     email.intent_confidence = intent["confidence_score"]
     email.intent_reason = intent["reason"]
-    await db.flush()
-
-    # =================================================
-    # 2. FACT EXTRACTION (ALWAYS)
-    # =================================================
-    extraction = extract_facts(
-        subject=email.subject,
-        body=email.body,
-    )
+    email.intent_route = intent.get("route")
+    email.intent_triage_confidence = intent.get("triage_confidence")
 
-    email.extracted_facts = extraction["facts"]
-    email.fact_confidence = extraction["confidence"]
-    email.missing_fields = extraction["missing_fields"]
+    if extraction is not None:
+        email.extracted_facts = extraction["facts"]
+        email.fact_confidence = extraction["confidence"]
+        email.missing_fields = extraction["missing_fields"]
     await db.flush()
 
     # =================================================
     # 3. NOT A DISPUTE
     # =================================================
     if intent["intent"] == "NOT_DISPUTE":
+        # Speculative embedding is discarded, never persisted
+        _record_timings(email, timings, started)
         await db.commit()
         return None
 
@@ -123,16 +249,17 @@ async def resolve_email(
                 )
             )
             if existing.scalars().first():
+                _record_timings(email, timings, started)
                 await db.commit()
                 return {
                     "action": "WAITING",
                     "reason": "Clarification already sent for this thread",
                 }
 
-        clarification_text = build_clarification_email(
+        clarification_text = await _timed(timings, "clarification", abuild_clarification_email(
             known_facts=extraction["facts"],
             missing_fields=extraction["missing_fields"][:2],
-        )
+        ))
 
         if not clarification_text:
             clarification_text = (
@@ -140,18 +267,22 @@ async def resolve_email(
                 "and the billed amount related to this issue?"
             )
 
-        send_reply(
-            service=gmail_service,
-            to=sender,
-            subject=build_reply_subject(email.subject),
-            body=clarification_text,
-            in_reply_to=email.gmail_message_id,
-            thread_id=email.thread_id,
+        await outbox.send_reply(
+            db,
+            email.gmail_message_id,
+            build_reply_payload(
+                to=sender,
+                subject=build_reply_subject(email.subject),
+                body=clarification_text,
+                in_reply_to=email.gmail_message_id,
+                thread_id=email.thread_id,
+            ),
         )
 
         email.clarification_sent = True
         await mark_intake_waiting(case)
 
+        _record_timings(email, timings, started)
         await db.commit()
         return {
             "action": "CLARIFICATION_SENT",
@@ -168,19 +299,21 @@ async def resolve_email(
         thread_id=email.thread_id,
     )
     
-    # embed only for real disputes
-    email.embedding = embed_email(
-        subject=email.subject,
-        body=email.body,
-    )
+    # embedding is persisted only for real disputes
+    if speculative_embedding is None:
+        speculative_embedding = await _timed(timings, "embed_retry", aembed_email(
+            subject=email.subject,
+            body=body,
+        ))
+    email.embedding = speculative_embedding
     await db.flush()
 
-    candidates = await find_candidate_disputes(
+    candidates = await _timed(timings, "vector_search", find_candidate_disputes(
         db=db,
         supplier_id=email.supplier_id,
         email_embedding=email.embedding,
         k=3,
-    )
+    ))
 
     if not candidates:
         decision = {
@@ -189,12 +322,12 @@ async def resolve_email(
             "reason": "No candidate disputes found",
         }
     else:
-        decision = decide_dispute(
+        decision = await _timed(timings, "decision", adecide_dispute(
         subject=email.subject,
-        body=email.body,
+        body=body,
         extracted_facts=extraction["facts"],  # still used for hard match
         candidate_disputes=candidates,
-    )
+    ))
 
     # =================================================
     # 5a. MATCH EXISTING DISPUTE
@@ -207,7 +340,7 @@ async def resolve_email(
 
         dispute = await db.get(Dispute, dispute_id)
         if dispute:
-            await resummarize_dispute(db=db, dispute=dispute)
+            await _timed(timings, "resummarize", resummarize_dispute(db=db, dispute=dispute))
 
         # ---- PROMOTE INTAKE CASE IF EXISTS ----
         if intake_case and intake_case.case_type == "INTAKE":
@@ -216,21 +349,24 @@ async def resolve_email(
                 dispute_id=dispute_id,
             )
 
+        _record_timings(email, timings, started)
         await db.commit()
         return decision
 
     # =================================================
     # 5b. CREATE NEW DISPUTE
     # =================================================
-    summary = generate_dispute_summary(
+    summary = await _timed(timings, "summary", agenerate_dispute_summary(
         subject=email.subject,
-        body=email.body,
-    )
+        body=body,
+    ))
 
     dispute = Dispute(
         supplier_id=email.supplier_id,
         summary=summary,
-        summary_embedding=embed_email("Dispute summary", summary),
+        summary_embedding=await _timed(
+            timings, "summary_embed", aembed_email("Dispute summary", summary)
+        ),
     )
 
     db.add(dispute)
@@ -245,6 +381,7 @@ async def resolve_email(
             dispute_id=dispute.id,
         )
 
+    _record_timings(email, timings, started)
     await db.commit()
 
     return {
@@ -1,9 +1,19 @@
-from dispute_resolution.llm.client import embeddings
+from dispute_resolution.llm.client import aembed_text, embed_text
+
+
+def _email_text(subject: str, body: str) -> str:
+    return f"Subject: {subject}\n\n{body}"
 
 
 def embed_email(subject: str, body: str) -> list[float]:
     """
     Generate embedding for an email using BGE-M3.
     """
-    text = f"Subject: {subject}\n\n{body}"
-    return embeddings.embed_query(text)
+    return embed_text(_email_text(subject, body))
+
+
+async def aembed_email(subject: str, body: str) -> list[float]:
+    """
+    Async embed_email; does not block the event loop.
+    """
+    return await aembed_text(_email_text(subject, body))
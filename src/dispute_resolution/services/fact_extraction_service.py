@@ -1,11 +1,13 @@
+import copy
 import json
 import re
 from typing import Any, Dict, List
 
-from dispute_resolution.llm.client import llm
-from dispute_resolution.utils.llm import normalize_llm_content
+from dispute_resolution.config import settings
+from dispute_resolution.llm.client import ainvoke_json, ainvoke_llm, invoke_json, invoke_llm
 from dispute_resolution.utils.logging import logger
-from dispute_resolution.llm.prompts import FACT_EXTRACTION_PROMPT
+from dispute_resolution.llm.prompts import FACT_EXTRACTION_PROMPT, ISSUE_ACTION_PROMPT
+from dispute_resolution.services.fact_patterns import extract_patterns, fill_missing
 
 
 # =================================================
@@ -116,15 +118,26 @@ def _infer_missing_fields(facts: Dict[str, Any]) -> List[str]:
 # Enum validation
 # =================================================
 
+ISSUE_CATEGORIES = {
+    "OVERCHARGE",
+    "SHORT_PAYMENT",
+    "DUPLICATE",
+    "TAX",
+    "UNKNOWN",
+}
+
+ACTION_TYPES = {
+    "REVISED_INVOICE",
+    "PAYMENT",
+    "CREDIT_NOTE",
+    "CLARIFICATION",
+    "UNKNOWN",
+}
+
+
 def _normalize_enums(payload: Dict[str, Any]) -> None:
     issue_category = payload["facts"]["issue"].get("category")
-    if issue_category not in {
-        "OVERCHARGE",
-        "SHORT_PAYMENT",
-        "DUPLICATE",
-        "TAX",
-        "UNKNOWN",
-    }:
+    if issue_category not in ISSUE_CATEGORIES:
         payload["facts"]["issue"]["category"] = "UNKNOWN"
 
     direction = payload["facts"]["financials"]["disputed_amount"].get("direction")
@@ -132,16 +145,132 @@ def _normalize_enums(payload: Dict[str, Any]) -> None:
         payload["facts"]["financials"]["disputed_amount"]["direction"] = "UNKNOWN"
 
     action = payload["facts"]["requested_action"].get("type")
-    if action not in {
-        "REVISED_INVOICE",
-        "PAYMENT",
-        "CREDIT_NOTE",
-        "CLARIFICATION",
-        "UNKNOWN",
-    }:
+    if action not in ACTION_TYPES:
         payload["facts"]["requested_action"]["type"] = "UNKNOWN"
 
 
+# =================================================
+# Prompt + normalization
+# =================================================
+
+def _build_prompt(subject: str, body: str) -> str:
+    return FACT_EXTRACTION_PROMPT.format(
+        schema=json.dumps(EMPTY_EXTRACTION, indent=2),
+        subject=subject,
+        body=body,
+    )
+
+
+def _normalize_extraction(raw: str) -> Dict[str, Any]:
+    return normalize_extraction(_safe_extract_json(raw))
+
+
+def normalize_extraction(data: Dict[str, Any] | None) -> Dict[str, Any]:
+    """
+    Merge a parsed extraction payload into the canonical structure,
+    validate enums and infer missing fields. ``None`` yields the empty
+    structure.
+    """
+    # Deep copy: _normalize_enums mutates the nested facts dicts
+    normalized = copy.deepcopy(EMPTY_EXTRACTION)
+
+    if not data:
+        logger.error("Failed to parse fact extraction JSON")
+    else:
+        # Shallow, type-safe merge
+        for key in normalized:
+            if key in data and isinstance(data[key], type(normalized[key])):
+                normalized[key] = data[key]
+
+    # Enum validation
+    _normalize_enums(normalized)
+
+    # -------------------------------------------------
+    # 🔑 CRITICAL FIX: deterministic missing fields
+    # -------------------------------------------------
+    inferred_missing = _infer_missing_fields(normalized["facts"])
+    normalized["missing_fields"] = inferred_missing
+
+    return normalized
+
+
+# =================================================
+# Pattern-first extraction
+# =================================================
+
+def _pre_extract(
+    subject: str,
+    body: str,
+    supplier_patterns: Dict[str, List[str]] | None,
+) -> Dict[str, Any] | None:
+    """
+    Deterministic identifier/amount pass (None when PATTERN_EXTRACTION is off).
+    """
+    if not settings.PATTERN_EXTRACTION:
+        return None
+
+    found = extract_patterns(subject, body, supplier_patterns, empty=EMPTY_EXTRACTION)
+    found["missing_fields"] = _infer_missing_fields(found["facts"])
+    return found
+
+
+def fill_from_patterns(
+    extraction: Dict[str, Any],
+    *,
+    subject: str,
+    body: str,
+    supplier_patterns: Dict[str, List[str]] | None = None,
+) -> Dict[str, Any]:
+    """
+    Complete an LLM extraction with pattern-found identifiers and
+    amounts it missed (no-op when PATTERN_EXTRACTION is off).
+    """
+    found = _pre_extract(subject, body, supplier_patterns)
+    if found is None:
+        return extraction
+
+    fill_missing(extraction, found)
+    extraction["missing_fields"] = _infer_missing_fields(extraction["facts"])
+    return extraction
+
+
+def _build_issue_prompt(subject: str, body: str) -> str:
+    return ISSUE_ACTION_PROMPT.format(subject=subject, body=body)
+
+
+def _merge_issue_action(
+    found: Dict[str, Any],
+    data: Dict[str, Any] | None,
+) -> Dict[str, Any]:
+    """
+    Take issue / requested_action from the LLM on top of the pattern
+    result. A pattern guess is kept where the LLM answers UNKNOWN.
+    """
+    result = copy.deepcopy(found)
+    facts = result["facts"]
+
+    if not isinstance(data, dict):
+        logger.error("Failed to parse issue/action extraction JSON")
+        data = {}
+
+    issue = data.get("issue") if isinstance(data.get("issue"), dict) else {}
+    if issue.get("category") in ISSUE_CATEGORIES - {"UNKNOWN"}:
+        facts["issue"]["category"] = issue["category"]
+    if isinstance(issue.get("description"), str):
+        facts["issue"]["description"] = issue["description"]
+
+    action = data.get("requested_action") if isinstance(data.get("requested_action"), dict) else {}
+    if action.get("type") in ACTION_TYPES - {"UNKNOWN"}:
+        facts["requested_action"]["type"] = action["type"]
+
+    if isinstance(data.get("confidence"), dict):
+        result["confidence"].update(data["confidence"])
+
+    _normalize_enums(result)
+    result["missing_fields"] = _infer_missing_fields(facts)
+    return result
+
+
 # =================================================
 # Public API
 # =================================================
@@ -150,52 +279,90 @@ def extract_facts(
     *,
     subject: str,
     body: str,
+    supplier_patterns: Dict[str, List[str]] | None = None,
 ) -> Dict[str, Any]:
     """
     Extract structured dispute facts from an email.
 
+    With PATTERN_EXTRACTION, identifiers and amounts come from
+    fact_patterns and the LLM only fills issue / requested_action
+    (skipped entirely when nothing required is missing).
+
     Guarantees:
     - never raises
     - never decides intent
     - never sends emails
     - always returns a complete canonical structure
     """
-
-    prompt = FACT_EXTRACTION_PROMPT.format(
-        schema=json.dumps(EMPTY_EXTRACTION, indent=2),
-        subject=subject,
-        body=body,
-    )
+    found = _pre_extract(subject, body, supplier_patterns)
+    if found is not None and not found["missing_fields"]:
+        logger.info("All required facts found by patterns, skipping LLM extraction")
+        return found
 
     logger.info("Running LLM fact extraction")
 
+    if found is not None:
+        prompt = _build_issue_prompt(subject, body)
+        try:
+            if settings.STRUCTURED_LLM_OUTPUT:
+                data = invoke_json(prompt)
+            else:
+                data = _safe_extract_json(invoke_llm(prompt))
+        except Exception:
+            logger.exception("LLM call failed during issue/action extraction")
+            data = None
+        return _merge_issue_action(found, data)
+
+    prompt = _build_prompt(subject, body)
+
     try:
-        response = llm.invoke(prompt)
+        if settings.STRUCTURED_LLM_OUTPUT:
+            return normalize_extraction(invoke_json(prompt))
+        raw = invoke_llm(prompt)
     except Exception:
         logger.exception("LLM call failed during fact extraction")
-        return EMPTY_EXTRACTION.copy()
+        return copy.deepcopy(EMPTY_EXTRACTION)
 
-    raw = normalize_llm_content(response.content).strip()
-    data = _safe_extract_json(raw)
+    return _normalize_extraction(raw)
 
-    if not data:
-        logger.error("Failed to parse fact extraction JSON")
-        normalized = EMPTY_EXTRACTION.copy()
-    else:
-        normalized = EMPTY_EXTRACTION.copy()
 
-        # Shallow, type-safe merge
-        for key in normalized:
-            if key in data and isinstance(data[key], type(normalized[key])):
-                normalized[key] = data[key]
+async def aextract_facts(
+    *,
+    subject: str,
+    body: str,
+    supplier_patterns: Dict[str, List[str]] | None = None,
+) -> Dict[str, Any]:
+    """
+    Async extract_facts, with the same guarantees.
+    A timed-out call returns the empty (or pattern-only) structure.
+    """
+    found = _pre_extract(subject, body, supplier_patterns)
+    if found is not None and not found["missing_fields"]:
+        logger.info("All required facts found by patterns, skipping LLM extraction")
+        return found
 
-    # Enum validation
-    _normalize_enums(normalized)
+    logger.info("Running LLM fact extraction")
 
-    # -------------------------------------------------
-    # 🔑 CRITICAL FIX: deterministic missing fields
-    # -------------------------------------------------
-    inferred_missing = _infer_missing_fields(normalized["facts"])
-    normalized["missing_fields"] = inferred_missing
+    if found is not None:
+        prompt = _build_issue_prompt(subject, body)
+        try:
+            if settings.STRUCTURED_LLM_OUTPUT:
+                data = await ainvoke_json(prompt)
+            else:
+                data = _safe_extract_json(await ainvoke_llm(prompt))
+        except Exception:
+            logger.exception("LLM call failed during issue/action extraction")
+            data = None
+        return _merge_issue_action(found, data)
 
-    return normalized
+    prompt = _build_prompt(subject, body)
+
+    try:
+        if settings.STRUCTURED_LLM_OUTPUT:
+            return normalize_extraction(await ainvoke_json(prompt))
+        raw = await ainvoke_llm(prompt)
+    except Exception:
+        logger.exception("LLM call failed during fact extraction")
+        return copy.deepcopy(EMPTY_EXTRACTION)
+
+    return _normalize_extraction(raw)
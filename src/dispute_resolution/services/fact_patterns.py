@@ -0,0 +1,214 @@
+"""
+Deterministic pre-extraction of dispute facts.
+
+Compiled patterns find invoice / PO / credit-note numbers, currencies
+and amounts (plus the issue category and requested action when the
+wording is unambiguous). Suppliers with their own numbering add
+patterns in Supplier.identifier_patterns:
+
+    {"invoice_numbers": ["ABC/\\d{2}-\\d{2}/\\d{4}"], "purchase_order_numbers": [...]}
+
+A pattern with a capture group contributes group 1, otherwise the whole
+match. Nothing is calculated or guessed: amounts are only assigned to a
+field when a keyword right before them says which one they are.
+"""
+
+import copy
+import re
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from dispute_resolution.utils.logging import logger
+
+
+# Keys match facts["commercial_identifiers"]
+IDENTIFIER_PATTERNS: Dict[str, List[str]] = {
+    "invoice_numbers": [
+        r"\b(INV[-/]?[A-Z0-9]*\d[A-Z0-9/-]*)",
+        r"\binvoice\s*(?:no\.?|number|num|#)\s*:?\s*([A-Z0-9]*\d[A-Z0-9/-]*)",
+    ],
+    "purchase_order_numbers": [
+        r"\b(PO[-/]?\d[A-Z0-9/-]*)",
+        r"\b(?:PO|purchase order)\s*(?:no\.?|number|num|#)\s*:?\s*([A-Z0-9]*\d[A-Z0-9/-]*)",
+    ],
+    "credit_note_numbers": [
+        r"\b(CN[-/]?\d[A-Z0-9/-]*)",
+        r"\bcredit note\s*(?:no\.?|number|num|#)\s*:?\s*([A-Z0-9]*\d[A-Z0-9/-]*)",
+    ],
+}
+
+_CURRENCIES = {
+    "inr": "INR", "rs": "INR", "rs.": "INR", "₹": "INR",
+    "usd": "USD", "$": "USD",
+    "eur": "EUR", "€": "EUR",
+    "gbp": "GBP", "£": "GBP",
+}
+
+_AMOUNT_RE = re.compile(
+    r"(?P<currency>\b(?:INR|USD|EUR|GBP|Rs\.?)|₹|\$|€|£)\s?(?P<value>\d[\d,]*(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+
+# Keyword immediately before an amount (same clause) → which field it is.
+# Only keyword + optional noun + copula may sit between them, so "we
+# agreed but you billed INR 5,000" or "incorrect amount" never match.
+_NOUN = r"(?:\s+(?:value|price|rate|amount))?"
+_COPULA = r"(?:\s+(?:is|was|of)|\s*[:=])?\s*$"
+
+_EXPECTED_CONTEXT = re.compile(
+    rf"\b(?:agreed|PO|purchase order|contract(?:ed)?|quoted|expected|correct){_NOUN}{_COPULA}"
+    r"|\bshould (?:have been|be)\s*$",
+    re.IGNORECASE,
+)
+_PAID_CONTEXT = re.compile(
+    r"\b(?:paid|received|remitted|transferred|payment of)(?:\s+(?:only|just))?"
+    r"(?:\s+(?:an amount of|of)|\s*:)?\s*$",
+    re.IGNORECASE,
+)
+_DISPUTED_CONTEXT = re.compile(
+    r"\b(?P<kind>over-?charg\w*|excess|short[- ]?pa\w*|under-?pa\w*|difference|shortfall|balance)"
+    rf"(?:\s+amount)?{_COPULA}",
+    re.IGNORECASE,
+)
+
+# Issue category / requested action, only when exactly one matches
+_CATEGORY_PATTERNS = {
+    "OVERCHARGE": re.compile(r"\bover-?charg|\bexcess (?:amount|charge|billing)|\bbilled (?:more|higher)", re.IGNORECASE),
+    "SHORT_PAYMENT": re.compile(r"\bshort[- ]?pa(?:id|yment)|\bunder-?pa(?:id|yment)", re.IGNORECASE),
+    "DUPLICATE": re.compile(r"\bduplicate (?:invoice|charge|billing|payment)|\bbilled twice", re.IGNORECASE),
+    "TAX": re.compile(r"\b(?:GST|TDS|VAT|tax) (?:difference|mismatch|error|rate|amount)|\bincorrect (?:tax|GST)", re.IGNORECASE),
+}
+
+_ACTION_PATTERNS = {
+    "REVISED_INVOICE": re.compile(r"\b(?:revised|corrected|amended) invoice|\bre-?issue the invoice", re.IGNORECASE),
+    "CREDIT_NOTE": re.compile(r"\b(?:issue|raise|send|share|provide) (?:us )?a credit note", re.IGNORECASE),
+    "PAYMENT": re.compile(r"\b(?:pay|release|clear|remit) (?:the )?(?:balance|remaining|pending|outstanding|short)", re.IGNORECASE),
+}
+
+
+@lru_cache(maxsize=256)
+def _compile(pattern: str) -> re.Pattern | None:
+    try:
+        return re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        logger.warning(f"Ignoring invalid supplier identifier pattern {pattern!r}")
+        return None
+
+
+def _find_identifiers(text: str, patterns: List[str]) -> List[str]:
+    found: Dict[str, None] = {}
+    for pattern in patterns:
+        compiled = _compile(pattern)
+        if compiled is None:
+            continue
+        for match in compiled.finditer(text):
+            value = match.group(1) if compiled.groups else match.group(0)
+            value = value.strip().rstrip(".,;:/-")
+            if value:
+                found.setdefault(value.upper(), None)
+    return list(found)
+
+
+def _amount(match: re.Match) -> tuple[float, str]:
+    currency = _CURRENCIES.get(match.group("currency").lower(), match.group("currency").upper())
+    return float(match.group("value").replace(",", "")), currency
+
+
+def _only_one(patterns: Dict[str, re.Pattern], text: str) -> str:
+    hits = [name for name, pattern in patterns.items() if pattern.search(text)]
+    return hits[0] if len(hits) == 1 else "UNKNOWN"
+
+
+def extract_patterns(
+    subject: str,
+    body: str,
+    supplier_patterns: Dict[str, List[str]] | None = None,
+    *,
+    empty: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Fill a copy of ``empty`` (the canonical extraction structure) with
+    everything the patterns can find. Found fields get confidence 1.0
+    and the matched text as evidence; missing_fields is left to the caller.
+    """
+    text = f"{subject}\n{body}"
+    result = copy.deepcopy(empty)
+    facts = result["facts"]
+    confidence = result["confidence"]
+    evidence = result["evidence"]
+
+    # ---- Identifiers ----
+    for field, defaults in IDENTIFIER_PATTERNS.items():
+        patterns = defaults + list((supplier_patterns or {}).get(field, []))
+        values = _find_identifiers(text, patterns)
+        if values:
+            facts["commercial_identifiers"][field] = values
+            confidence[f"commercial_identifiers.{field}"] = 1.0
+            evidence[f"commercial_identifiers.{field}"] = values
+
+    # ---- Amounts ----
+    fin = facts["financials"]
+    for match in _AMOUNT_RE.finditer(text):
+        value, currency = _amount(match)
+        before = text[max(0, match.start() - 60):match.start()]
+        # Stay within the clause the amount belongs to
+        before = re.split(r"[.;\n]", before)[-1]
+
+        disputed = _DISPUTED_CONTEXT.search(before)
+        if disputed and fin["disputed_amount"]["value"] is None:
+            kind = disputed.group("kind").lower()
+            fin["disputed_amount"] = {
+                "value": value,
+                "currency": currency,
+                "direction": "OVERCHARGE" if kind.startswith(("over", "excess")) else
+                             "UNDERPAYMENT" if kind.startswith(("short", "under")) else
+                             "UNKNOWN",
+            }
+            confidence["financials.disputed_amount"] = 1.0
+            evidence["financials.disputed_amount"] = match.group(0)
+        elif _EXPECTED_CONTEXT.search(before) and fin["expected_amount"] is None:
+            fin["expected_amount"] = value
+            confidence["financials.expected_amount"] = 1.0
+            evidence["financials.expected_amount"] = match.group(0)
+        elif _PAID_CONTEXT.search(before) and fin["paid_amount"] is None:
+            fin["paid_amount"] = value
+            confidence["financials.paid_amount"] = 1.0
+            evidence["financials.paid_amount"] = match.group(0)
+
+    # ---- Issue / requested action ----
+    category = _only_one(_CATEGORY_PATTERNS, text)
+    if category != "UNKNOWN":
+        facts["issue"]["category"] = category
+        confidence["issue.category"] = 0.9
+
+    action = _only_one(_ACTION_PATTERNS, text)
+    if action != "UNKNOWN":
+        facts["requested_action"]["type"] = action
+        confidence["requested_action.type"] = 0.9
+
+    return result
+
+
+def fill_missing(extraction: Dict[str, Any], found: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy pattern-found identifiers and amounts into an LLM extraction
+    wherever the LLM left them empty. The caller re-infers missing_fields.
+    """
+    ci = extraction["facts"]["commercial_identifiers"]
+    for field, values in found["facts"]["commercial_identifiers"].items():
+        if values and not ci.get(field):
+            ci[field] = values
+
+    fin = extraction["facts"]["financials"]
+    found_fin = found["facts"]["financials"]
+    for field in ("expected_amount", "paid_amount"):
+        if fin.get(field) is None and found_fin[field] is not None:
+            fin[field] = found_fin[field]
+    if (fin.get("disputed_amount") or {}).get("value") is None and found_fin["disputed_amount"]["value"] is not None:
+        fin["disputed_amount"] = found_fin["disputed_amount"]
+
+    for key in ("confidence", "evidence"):
+        for field, value in found[key].items():
+            extraction[key].setdefault(field, value)
+
+    return extraction
@@ -0,0 +1,77 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+from dispute_resolution.config import settings
+from dispute_resolution.llm.client import ainvoke_json, ainvoke_llm, invoke_json, invoke_llm
+from dispute_resolution.llm.prompts import INTENT_AND_FACTS_PROMPT
+from dispute_resolution.services.fact_extraction_service import (
+    EMPTY_EXTRACTION,
+    _safe_extract_json,
+    fill_from_patterns,
+    normalize_extraction,
+)
+from dispute_resolution.services.intent_service import validate_intent
+from dispute_resolution.utils.logging import logger
+
+
+def _build_prompt(subject: str, body: str) -> str:
+    return INTENT_AND_FACTS_PROMPT.format(
+        schema=json.dumps(EMPTY_EXTRACTION, indent=2),
+        subject=subject,
+        body=body,
+    )
+
+
+def _validate(
+    data: Dict[str, Any] | None,
+    subject: str,
+    body: str,
+    supplier_patterns: Dict[str, List[str]] | None,
+) -> Tuple[dict, Dict[str, Any]]:
+    extraction = fill_from_patterns(
+        normalize_extraction(data),
+        subject=subject,
+        body=body,
+        supplier_patterns=supplier_patterns,
+    )
+    return validate_intent(data), extraction
+
+
+def classify_and_extract(
+    subject: str,
+    body: str,
+    supplier_patterns: Dict[str, List[str]] | None = None,
+) -> Tuple[dict, Dict[str, Any]]:
+    """
+    One LLM call for both intent and facts.
+
+    Returns (intent, extraction) in exactly the shapes of
+    classify_intent() and extract_facts(), with the same validation.
+    Identifiers and amounts the model missed are filled from patterns.
+    """
+    logger.info("Calling LLM fused intent classification + fact extraction")
+
+    prompt = _build_prompt(subject, body)
+    if settings.STRUCTURED_LLM_OUTPUT:
+        data = invoke_json(prompt)
+    else:
+        data = _safe_extract_json(invoke_llm(prompt))
+    return _validate(data, subject, body, supplier_patterns)
+
+
+async def aclassify_and_extract(
+    subject: str,
+    body: str,
+    supplier_patterns: Dict[str, List[str]] | None = None,
+) -> Tuple[dict, Dict[str, Any]]:
+    """
+    Async classify_and_extract; does not block the event loop.
+    """
+    logger.info("Calling LLM fused intent classification + fact extraction")
+
+    prompt = _build_prompt(subject, body)
+    if settings.STRUCTURED_LLM_OUTPUT:
+        data = await ainvoke_json(prompt)
+    else:
+        data = _safe_extract_json(await ainvoke_llm(prompt))
+    return _validate(data, subject, body, supplier_patterns)
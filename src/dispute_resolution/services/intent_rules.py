@@ -0,0 +1,247 @@
+"""
+Deterministic intent pre-classifier.
+
+Decides the obvious cases (auto-replies, read receipts, greetings on one
+side; explicit invoice overcharges with amounts on the other) from
+headers, compiled regex banks and keyword scores, so they never reach
+the LLM. Anything not clearly one-sided returns None and goes to
+classify_intent as before.
+"""
+
+import re
+from collections import Counter
+
+from dispute_resolution.config import settings
+from dispute_resolution.utils.logging import logger
+
+
+# hits / hits_dispute / hits_not_dispute / evaluated / shadow_compared / shadow_agreed
+rule_stats: Counter = Counter()
+
+
+def _bank(*patterns: str) -> re.Pattern:
+    return re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+
+
+# -------------------------
+# NOT_DISPUTE banks
+# -------------------------
+
+_AUTO_SUBJECT = _bank(
+    r"^\s*(?:automatic|auto)[- ]?reply\b",
+    r"^\s*out of (?:the )?office\b",
+    r"^\s*(?:read|delivered|undeliverable|not read)\s*:",
+    r"^\s*read receipt\b",
+    r"^\s*delivery status notification\b",
+)
+
+_OUT_OF_OFFICE = _bank(
+    r"\bI am (?:currently )?out of (?:the )?office\b",
+    r"\bI(?:'m| am) (?:currently )?(?:on|away on) (?:annual |sick |maternity |paternity )?leave\b",
+    r"\bwith limited access to (?:my )?e-?mail\b",
+    r"\bwill (?:be back|return) (?:on|by)\b",
+    r"\bthis is an automated (?:reply|response|message)\b",
+)
+
+_GREETING = _bank(
+    r"\bhappy new year\b",
+    r"\bseason'?s greetings\b",
+    r"\bmerry christmas\b",
+    r"\bhappy (?:diwali|holidays|eid|holi|pongal|onam)\b",
+    r"\bwarm(?:est)? wishes\b",
+)
+
+_ACKNOWLEDGEMENT = _bank(
+    r"\bthank(?:s| you) for (?:your|the) (?:e-?mail|payment|confirmation|update)\b",
+    r"\b(?:noted|received) with thanks\b",
+    r"\bwell received\b",
+    r"\bpayment (?:has been )?received\b",
+)
+
+# -------------------------
+# DISPUTE banks
+# -------------------------
+
+_INVOICE_REF = _bank(
+    r"\bINV[-/ ]?\d{2,}\b",
+    r"\binvoice\s*(?:no\.?|number|num|#)\s*:?\s*[A-Z0-9][A-Z0-9/-]{2,}\b",
+)
+
+_DISPUTE_TERMS = _bank(
+    r"\bover-?charg(?:e|ed|ing)\b",
+    r"\bshort[- ]?(?:paid|payment)\b",
+    r"\bunder-?pa(?:id|yment)\b",
+    r"\bduplicate (?:invoice|charge|billing|payment)\b",
+    r"\bincorrect (?:amount|invoice|rate|price|tax|gst)\b",
+    r"\bwrong(?:ly)? (?:billed|charged|amount|rate)\b",
+    r"\bdiscrepanc(?:y|ies)\b",
+    r"\bmismatch\b",
+    r"\bdisput(?:e|ed|ing)\b",
+    r"\bexcess (?:amount|charge|billing)\b",
+    r"\bbilled (?:twice|incorrectly)\b",
+)
+
+_AMOUNT = re.compile(
+    r"(?:INR|USD|EUR|GBP|Rs\.?|₹|\$|€|£)\s?\d[\d,]*(?:\.\d+)?",
+    re.IGNORECASE,
+)
+
+_COMPARISON = _bank(
+    r"\bwhereas\b",
+    r"\bvs\.?\b",
+    r"\bversus\b",
+    r"\binstead of\b",
+    r"\bas against\b",
+    r"\bexceeds?\b",
+    r"\b(?:agreed|PO|contract(?:ed)?) (?:value|price|rate|amount)\b",
+)
+
+
+def _auto_reply_header(headers: dict[str, str]) -> str | None:
+    """
+    Headers that on their own mark an auto-reply or read receipt.
+    Bulk / machine-generated mail is NOT decisive: supplier billing
+    systems send real disputes that way (see _bulk_header).
+    """
+    if headers.get("auto-submitted", "").strip().lower() == "auto-replied":
+        return "Auto-Submitted: auto-replied header"
+    if "x-autoreply" in headers or "x-autorespond" in headers:
+        return "auto-responder header"
+    if headers.get("precedence", "").strip().lower() == "auto_reply":
+        return "auto_reply Precedence header"
+
+    content_type = headers.get("content-type", "").lower()
+    if "multipart/report" in content_type and "disposition-notification" in content_type:
+        return "read receipt"
+
+    return None
+
+
+def _bulk_header(headers: dict[str, str]) -> bool:
+    auto_submitted = headers.get("auto-submitted", "").strip().lower()
+    return (
+        auto_submitted not in {"", "no"}
+        or headers.get("precedence", "").strip().lower() in {"bulk", "junk", "list"}
+    )
+
+
+def _scores(
+    subject: str,
+    body: str,
+    headers: dict[str, str],
+) -> tuple[int, int, list[str]]:
+    text = f"{subject}\n{body}"
+    dispute = 0
+    not_dispute = 0
+    signals: list[str] = []
+
+    if _bulk_header(headers):
+        not_dispute += 1
+        signals.append("bulk/auto-generated header")
+
+    if _AUTO_SUBJECT.search(subject):
+        not_dispute += 3
+        signals.append("auto-reply subject")
+    if _OUT_OF_OFFICE.search(body):
+        not_dispute += 2
+        signals.append("out-of-office text")
+    if _GREETING.search(text):
+        not_dispute += 2
+        signals.append("greeting")
+    if _ACKNOWLEDGEMENT.search(body):
+        not_dispute += 1
+        signals.append("acknowledgement")
+
+    if _INVOICE_REF.search(text):
+        dispute += 1
+        signals.append("invoice reference")
+
+    terms = {m.group(0).lower() for m in _DISPUTE_TERMS.finditer(text)}
+    if terms:
+        dispute += min(2 * len(terms), 4)
+        signals.append(f"dispute terms {sorted(terms)}")
+
+    amounts = _AMOUNT.findall(text)
+    if len(amounts) >= 2:
+        dispute += 1
+        signals.append("multiple amounts")
+        if _COMPARISON.search(text):
+            dispute += 1
+            signals.append("amount comparison")
+
+    return dispute, not_dispute, signals
+
+
+def _hit(intent: str, reason: str) -> dict:
+    rule_stats["hits"] += 1
+    rule_stats[f"hits_{intent.lower()}"] += 1
+    return {
+        "intent": intent,
+        # Same scale as the LLM prompt: strength of the dispute signal
+        "confidence_score": 0.95 if intent == "DISPUTE" else 0.05,
+        "reason": reason,
+        "route": "RULES",
+        "triage_confidence": None,
+    }
+
+
+def pre_classify(
+    subject: str,
+    body: str,
+    headers: dict[str, str] | None = None,
+) -> dict | None:
+    """
+    Return a classify_intent()-shaped result for emails the rules can
+    decide on their own, else None.
+
+    DISPUTE needs a dispute score of at least INTENT_RULES_DISPUTE_SCORE
+    with no greeting/auto-reply signal; NOT_DISPUTE needs a score of at
+    least INTENT_RULES_NOT_DISPUTE_SCORE with no dispute signal at all.
+    Auto-reply and read-receipt headers are decisive on their own; bulk
+    or auto-generated headers only add to the NOT_DISPUTE score.
+    """
+    rule_stats["evaluated"] += 1
+
+    headers = headers or {}
+    header_reason = _auto_reply_header(headers)
+    if header_reason:
+        return _hit("NOT_DISPUTE", f"Rule-based: {header_reason}")
+
+    dispute, not_dispute, signals = _scores(subject, body, headers)
+
+    if dispute >= settings.INTENT_RULES_DISPUTE_SCORE and not_dispute == 0:
+        return _hit("DISPUTE", f"Rule-based: {', '.join(signals)} (score {dispute})")
+
+    if not_dispute >= settings.INTENT_RULES_NOT_DISPUTE_SCORE and dispute == 0:
+        return _hit("NOT_DISPUTE", f"Rule-based: {', '.join(signals)} (score {not_dispute})")
+
+    return None
+
+
+def record_shadow(rule_intent: dict, llm_intent: dict) -> None:
+    """
+    In shadow mode, compare a rule decision with the LLM's and log it.
+    """
+    rule_stats["shadow_compared"] += 1
+    agreed = rule_intent["intent"] == llm_intent["intent"]
+    if agreed:
+        rule_stats["shadow_agreed"] += 1
+    else:
+        logger.warning(
+            f"Rule pre-classifier disagreed with LLM: rules={rule_intent['intent']} "
+            f"llm={llm_intent['intent']} | {rule_intent['reason']}"
+        )
+    logger.info(rule_report())
+
+
+def rule_report() -> str:
+    evaluated = rule_stats["evaluated"]
+    compared = rule_stats["shadow_compared"]
+    hit_rate = rule_stats["hits"] / evaluated if evaluated else 0.0
+    report = (
+        f"Intent rules | hit rate {hit_rate:.1%} of {evaluated} "
+        f"({rule_stats['hits_dispute']} DISPUTE, {rule_stats['hits_not_dispute']} NOT_DISPUTE)"
+    )
+    if compared:
+        report += f" | LLM agreement {rule_stats['shadow_agreed'] / compared:.1%} of {compared}"
+    return report
@@ -1,11 +1,25 @@
 import json
-from dispute_resolution.llm.client import llm
+from dispute_resolution.config import settings
+from dispute_resolution.llm.client import ainvoke_json, ainvoke_llm, invoke_json, invoke_llm
 from dispute_resolution.llm.prompts import INTENT_CLASSIFICATION_PROMPT
 from dispute_resolution.utils.logging import logger
-from dispute_resolution.utils.llm import normalize_llm_content
 
 CONFIDENCE_THRESHOLD = 0.85
 
+PARSE_FAILURE_REASON = "Could not parse LLM response"
+INVALID_INTENT_REASON = "Invalid intent value from LLM"
+
+# Ollama output schema for STRUCTURED_LLM_OUTPUT
+INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": ["DISPUTE", "AMBIGUOUS", "NOT_DISPUTE"]},
+        "confidence_score": {"type": "number"},
+        "reason": {"type": "string"},
+    },
+    "required": ["intent", "confidence_score", "reason"],
+}
+
 
 def _extract_json(text: str) -> str:
     text = text.strip()
@@ -15,34 +29,36 @@ def _extract_json(text: str) -> str:
     return text
 
 
-def classify_intent(subject: str, body: str) -> dict:
-    """
-    Returns:
-    {
-      "intent": "DISPUTE" | "NOT_DISPUTE" | "AMBIGUOUS",
-      "confidence_score": float,
-      "reason": str
-    }
-    """
-
-    prompt = INTENT_CLASSIFICATION_PROMPT.format(
+def _build_prompt(subject: str, body: str) -> str:
+    return INTENT_CLASSIFICATION_PROMPT.format(
         subject=subject,
         body=body,
     )
 
-    logger.info("Calling LLM intent classification")
 
-    response = llm.invoke(prompt)
-    raw = normalize_llm_content(response.content).strip()
+def _parse_intent(raw: str) -> dict:
     clean = _extract_json(raw)
 
     try:
         result = json.loads(clean)
     except json.JSONDecodeError:
+        result = None
+
+    return validate_intent(result)
+
+
+def validate_intent(result: dict | None) -> dict:
+    """
+    Validate a parsed intent payload and apply CONFIDENCE_THRESHOLD.
+    ``None`` (unparseable response) maps to AMBIGUOUS. ``valid`` is False
+    when the model's answer could not be used at all.
+    """
+    if not isinstance(result, dict):
         return {
             "intent": "AMBIGUOUS",
             "confidence_score": 0.0,
-            "reason": "Could not parse LLM response",
+            "reason": PARSE_FAILURE_REASON,
+            "valid": False,
         }
 
     intent = result.get("intent")
@@ -53,7 +69,8 @@ def classify_intent(subject: str, body: str) -> dict:
         return {
             "intent": "AMBIGUOUS",
             "confidence_score": 0.0,
-            "reason": "Invalid intent value from LLM",
+            "reason": INVALID_INTENT_REASON,
+            "valid": False,
         }
 
     try:
@@ -68,10 +85,94 @@ def classify_intent(subject: str, body: str) -> dict:
             "intent": "AMBIGUOUS",
             "confidence_score": confidence,
             "reason": reason,
+            "valid": True,
         }
 
     return {
         "intent": intent,
         "confidence_score": confidence,
         "reason": reason,
-    }
\ No newline at end of file
+        "valid": True,
+    }
+
+
+def _needs_escalation(triage: dict) -> bool:
+    """
+    The triage model only settles confident NOT_DISPUTE answers; anything
+    that can lead to a dispute or a supplier-facing clarification, and
+    any unusable answer, goes to LLM_MODEL.
+    """
+    if not triage["valid"] or triage["intent"] != "NOT_DISPUTE":
+        return True
+    return triage["confidence_score"] < settings.INTENT_TRIAGE_MIN_CONFIDENCE
+
+
+def _routed(result: dict, route: str, triage_confidence: float | None) -> dict:
+    return {**result, "route": route, "triage_confidence": triage_confidence}
+
+
+def _classify_with(prompt: str, model: str | None) -> dict:
+    if settings.STRUCTURED_LLM_OUTPUT:
+        return validate_intent(invoke_json(prompt, schema=INTENT_SCHEMA, model=model))
+    return _parse_intent(invoke_llm(prompt, model=model))
+
+
+async def _aclassify_with(prompt: str, model: str | None) -> dict:
+    if settings.STRUCTURED_LLM_OUTPUT:
+        return validate_intent(await ainvoke_json(prompt, schema=INTENT_SCHEMA, model=model))
+    return _parse_intent(await ainvoke_llm(prompt, model=model))
+
+
+def classify_intent(subject: str, body: str) -> dict:
+    """
+    Returns:
+    {
+      "intent": "DISPUTE" | "NOT_DISPUTE" | "AMBIGUOUS",
+      "confidence_score": float,
+      "reason": str,
+      "valid": bool,
+      "route": "DIRECT" | "TRIAGE" | "ESCALATED",
+      "triage_confidence": float | None
+    }
+
+    With INTENT_TRIAGE_MODEL set, the small model answers first and
+    LLM_MODEL is only asked when _needs_escalation() says so.
+    """
+    prompt = _build_prompt(subject, body)
+
+    if not settings.INTENT_TRIAGE_MODEL:
+        logger.info("Calling LLM intent classification")
+        return _routed(_classify_with(prompt, None), "DIRECT", None)
+
+    logger.info(f"Calling triage intent classification ({settings.INTENT_TRIAGE_MODEL})")
+    triage = _classify_with(prompt, settings.INTENT_TRIAGE_MODEL)
+    if not _needs_escalation(triage):
+        return _routed(triage, "TRIAGE", triage["confidence_score"])
+
+    logger.info(
+        f"Escalating intent classification "
+        f"(triage {triage['intent']} at {triage['confidence_score']:.2f})"
+    )
+    return _routed(_classify_with(prompt, None), "ESCALATED", triage["confidence_score"])
+
+
+async def aclassify_intent(subject: str, body: str) -> dict:
+    """
+    Async classify_intent; does not block the event loop.
+    """
+    prompt = _build_prompt(subject, body)
+
+    if not settings.INTENT_TRIAGE_MODEL:
+        logger.info("Calling LLM intent classification")
+        return _routed(await _aclassify_with(prompt, None), "DIRECT", None)
+
+    logger.info(f"Calling triage intent classification ({settings.INTENT_TRIAGE_MODEL})")
+    triage = await _aclassify_with(prompt, settings.INTENT_TRIAGE_MODEL)
+    if not _needs_escalation(triage):
+        return _routed(triage, "TRIAGE", triage["confidence_score"])
+
+    logger.info(
+        f"Escalating intent classification "
+        f"(triage {triage['intent']} at {triage['confidence_score']:.2f})"
+    )
+    return _routed(await _aclassify_with(prompt, None), "ESCALATED", triage["confidence_score"])
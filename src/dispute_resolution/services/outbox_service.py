@@ -0,0 +1,232 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from googleapiclient.errors import HttpError
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dispute_resolution.config import settings
+from dispute_resolution.ingestion.work_queue import retry_delay
+from dispute_resolution.models import OutboxItem
+from dispute_resolution.utils.logging import logger
+
+
+# Gmail batchModify accepts at most 1000 IDs per call
+BATCH_MODIFY_LIMIT = 1000
+
+
+class GmailOutbox:
+    """
+    Records Gmail side effects as outbox_items rows in the caller's
+    transaction. Nothing is sent until flush_outbox() runs, so a rollback
+    also discards the side effect.
+    """
+
+    async def modify_labels(
+        self,
+        db: AsyncSession,
+        message_id: str,
+        *,
+        add: list[str],
+        remove: list[str] | None = None,
+    ) -> None:
+        """
+        ``add``/``remove`` are label names (e.g. "Processed", "UNREAD");
+        flush_outbox() resolves them to IDs when it sends.
+        """
+        db.add(
+            OutboxItem(
+                kind="LABELS",
+                gmail_message_id=message_id,
+                payload={"add": add, "remove": remove or []},
+            )
+        )
+
+    async def send_reply(
+        self,
+        db: AsyncSession,
+        message_id: str,
+        payload: dict,
+    ) -> None:
+        db.add(
+            OutboxItem(
+                kind="REPLY",
+                gmail_message_id=message_id,
+                payload=payload,
+            )
+        )
+
+
+gmail_outbox = GmailOutbox()
+
+
+# -------------------------
+# Flush
+# -------------------------
+
+def _label_ids(label_map: dict[str, str], names: list[str]) -> list[str]:
+    # System labels (UNREAD, INBOX) are their own IDs
+    return [label_map.get(name, name) for name in names]
+
+
+async def _batch_modify(gmail, chunk: list[OutboxItem], add: list[str], remove: list[str]) -> None:
+    """
+    Apply one set of label names to ``chunk``, resolved to IDs with the
+    client's label map. If Gmail rejects an ID (400/404, e.g. a label was
+    deleted and recreated), reload the map and try once more.
+    """
+    message_ids = [item.gmail_message_id for item in chunk]
+    label_map = await gmail.ensure_labels()
+    try:
+        await gmail.batch_modify_labels(
+            message_ids,
+            add=_label_ids(label_map, add),
+            remove=_label_ids(label_map, remove),
+        )
+        return
+    except HttpError as e:
+        if e.resp.status not in (400, 404):
+            raise
+        logger.warning(f"Gmail rejected label IDs for {add + remove}, reloading label map")
+
+    label_map = await gmail.refresh_labels()
+    await gmail.batch_modify_labels(
+        message_ids,
+        add=_label_ids(label_map, add),
+        remove=_label_ids(label_map, remove),
+    )
+
+
+async def _claim(db: AsyncSession, *, owner: str, limit: int) -> list[OutboxItem]:
+    """
+    Lease up to ``limit`` due items (PENDING, or LEASED with an expired
+    lease after a flusher died mid-send) and commit, so no row lock or
+    connection is held while Gmail is called.
+    """
+    now = datetime.now(timezone.utc)
+
+    items = list(
+        (
+            await db.execute(
+                select(OutboxItem)
+                .where(
+                    or_(
+                        and_(OutboxItem.status == "PENDING", OutboxItem.available_at <= now),
+                        and_(OutboxItem.status == "LEASED", OutboxItem.lease_expires_at < now),
+                    )
+                )
+                .order_by(OutboxItem.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+        ).scalars().all()
+    )
+
+    for item in items:
+        item.status = "LEASED"
+        item.lease_owner = owner
+        item.lease_expires_at = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        item.attempts += 1
+
+    await db.commit()
+    return items
+
+
+def _leased_by(item_ids: list[int], owner: str):
+    # Outcomes only apply while this flush still holds the lease
+    return and_(
+        OutboxItem.id.in_(item_ids),
+        OutboxItem.lease_owner == owner,
+        OutboxItem.status == "LEASED",
+    )
+
+
+async def _record(
+    db: AsyncSession,
+    owner: str,
+    sent: list[OutboxItem],
+    failed: list[tuple[OutboxItem, Exception]],
+) -> None:
+    now = datetime.now(timezone.utc)
+    released = {"lease_owner": None, "lease_expires_at": None}
+
+    if sent:
+        await db.execute(
+            update(OutboxItem)
+            .where(_leased_by([item.id for item in sent], owner))
+            .values(status="SENT", sent_at=now, last_error=None, **released)
+        )
+
+    for item, error in failed:
+        dead = item.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+        if dead:
+            logger.error(f"Outbox item {item.id} ({item.kind}) moved to dead-letter")
+        await db.execute(
+            update(OutboxItem)
+            .where(_leased_by([item.id], owner))
+            .values(
+                status="DEAD" if dead else "PENDING",
+                last_error=repr(error)[:2000],
+                available_at=now if dead else now + timedelta(seconds=retry_delay(item.attempts)),
+                **released,
+            )
+        )
+
+    await db.commit()
+
+
+async def flush_outbox(db: AsyncSession, gmail, *, limit: int = 500) -> int:
+    """
+    Send pending outbox items through ``gmail`` (an AsyncGmailClient).
+
+    Label changes are queued by label name, grouped by identical
+    (add, remove) sets and applied with messages.batchModify; replies are
+    sent one by one. Rows are leased in one short transaction, sent with
+    no transaction open, and their outcome recorded in a second one, so
+    several flushers can run side by side. Returns the number of items sent.
+    """
+    owner = uuid.uuid4().hex
+    items = await _claim(db, owner=owner, limit=limit)
+    if not items:
+        return 0
+
+    sent: list[OutboxItem] = []
+    failed: list[tuple[OutboxItem, Exception]] = []
+
+    # ---- Labels: one batchModify per distinct label set ----
+    groups: dict[tuple[tuple[str, ...], tuple[str, ...]], list[OutboxItem]] = {}
+    for item in items:
+        if item.kind == "LABELS":
+            key = (
+                tuple(sorted(item.payload.get("add", []))),
+                tuple(sorted(item.payload.get("remove", []))),
+            )
+            groups.setdefault(key, []).append(item)
+
+    for (add, remove), group in groups.items():
+        for i in range(0, len(group), BATCH_MODIFY_LIMIT):
+            chunk = group[i:i + BATCH_MODIFY_LIMIT]
+            try:
+                await _batch_modify(gmail, chunk, list(add), list(remove))
+            except Exception as e:
+                logger.exception(f"batchModify failed for {len(chunk)} messages")
+                failed.extend((item, e) for item in chunk)
+                continue
+            sent.extend(chunk)
+
+    # ---- Replies ----
+    for item in items:
+        if item.kind != "REPLY":
+            continue
+        try:
+            await gmail.send_message(item.payload)
+        except Exception as e:
+            logger.exception(f"Failed to send reply for message {item.gmail_message_id}")
+            failed.append((item, e))
+            continue
+        sent.append(item)
+
+    await _record(db, owner, sent, failed)
+
+    logger.info(f"Flushed {len(sent)} of {len(items)} outbox items")
+    return len(sent)
@@ -1,5 +1,3 @@
-from googleapiclient.errors import HttpError
-from dispute_resolution.utils.logging import logger
 import base64
 from email.message import EmailMessage
 
@@ -16,18 +14,19 @@ def build_reply_subject(original_subject: str) -> str:
     return f"Re: {subject} — Clarification Required"
 
 
-def send_reply(
+def build_reply_payload(
     *,
-    service,
     to: str,
     subject: str,
     body: str,
     in_reply_to: str,
     thread_id: str | None = None,
-):
+) -> dict:
     """
-    Sends a system-generated reply in the same Gmail thread.
+    Build the Gmail messages.send body for a system-generated reply
+    in the same Gmail thread.
     Subject should already be normalized before calling.
+    Delivery happens later through the outbox (see outbox_service).
     """
 
     message = EmailMessage()
@@ -48,11 +47,4 @@ def send_reply(
     if thread_id:
         payload["threadId"] = thread_id
 
-    try:
-        service.users().messages().send(
-            userId="me",
-            body=payload,
-        ).execute()
-    except HttpError:
-        logger.exception("Failed to send clarification reply")
-        raise
+    return payload
@@ -3,15 +3,19 @@ from sqlalchemy import select
 from datetime import datetime, timezone
 
 from dispute_resolution.models import Dispute, Email
-from dispute_resolution.services.embedding_service import embed_email
-from dispute_resolution.llm.client import llm
+from dispute_resolution.services.embedding_service import aembed_email
+from dispute_resolution.config import settings
+from dispute_resolution.llm.budget import join_head_tail
+from dispute_resolution.llm.client import ainvoke_llm, invoke_llm
 from dispute_resolution.llm.prompts import SUMMARY_PROMPT, DISPUTE_CANONICAL_SUMMARY_PROMPT
-from dispute_resolution.utils.llm import normalize_llm_content
 
 def generate_dispute_summary(subject: str, body: str) -> str:
     prompt = SUMMARY_PROMPT.format(subject=subject, body=body)
-    response = llm.invoke(prompt)
-    return normalize_llm_content(response.content).strip()
+    return invoke_llm(prompt)
+
+async def agenerate_dispute_summary(subject: str, body: str) -> str:
+    prompt = SUMMARY_PROMPT.format(subject=subject, body=body)
+    return await ainvoke_llm(prompt)
 
 async def resummarize_dispute(
     *,
@@ -37,10 +41,13 @@ async def resummarize_dispute(
     if not emails:
         return
 
-    # 2. Build canonical context
-    combined_body = "\n\n---\n\n".join(
-        f"Subject: {e.subject}\nBody:\n{e.body}"
-        for e in emails
+    # 2. Build canonical context (first + most recent emails if too long)
+    combined_body = join_head_tail(
+        [f"Subject: {e.subject}\nBody:\n{e.new_content or e.body}" for e in emails],
+        settings.LLM_MAX_INPUT_TOKENS,
+        separator="\n\n---\n\n",
+        chars_per_token=settings.LLM_CHARS_PER_TOKEN,
+        label="dispute thread",
     )
 
     # 3. Generate canonical summary
@@ -48,12 +55,11 @@ async def resummarize_dispute(
         body=combined_body
     )
 
-    response = llm.invoke(prompt)
-    summary = normalize_llm_content(response.content).strip()
+    summary = await ainvoke_llm(prompt)
 
     # 4. Update dispute
     dispute.summary = summary
-    dispute.summary_embedding = embed_email(
+    dispute.summary_embedding = await aembed_email(
         subject="Dispute summary",
         body=summary,
     )
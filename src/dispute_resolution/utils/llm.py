@@ -23,3 +23,52 @@ def normalize_llm_content(content: Any) -> str:
         return "\n".join(parts)
 
     return str(content)
+
+
+class JsonObjectScanner:
+    """
+    Incrementally track where the first top-level JSON object in a
+    token stream ends, so generation can be stopped right there.
+    Text before the opening brace (prose, code fences) is skipped.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._consumed = 0
+
+    def feed(self, chunk: str) -> int | None:
+        """
+        Consume the next chunk. Returns the offset (in all text fed so
+        far) just past the closing brace once the object is complete,
+        else None.
+        """
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    return self._consumed + i + 1
+
+        self._consumed += len(chunk)
+        return None
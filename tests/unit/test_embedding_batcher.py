@@ -0,0 +1,56 @@
+import asyncio
+
+from dispute_resolution.llm.embedding_batcher import EmbeddingBatcher
+
+
+def test_concurrent_requests_share_one_call():
+    calls: list[list[str]] = []
+
+    async def embed_documents(texts):
+        calls.append(texts)
+        return [[float(len(t))] for t in texts]
+
+    async def run():
+        batcher = EmbeddingBatcher(embed_documents, max_batch=10, window_seconds=0.01)
+        return await asyncio.gather(
+            batcher.embed("a"),
+            batcher.embed("bb"),
+            batcher.embed("a"),
+        )
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [1.0]]
+    assert calls == [["a", "bb"]]
+
+
+def test_full_batch_is_sent_without_waiting_for_window():
+    calls: list[list[str]] = []
+
+    async def embed_documents(texts):
+        calls.append(texts)
+        return [[0.0] for _ in texts]
+
+    async def run():
+        batcher = EmbeddingBatcher(embed_documents, max_batch=2, window_seconds=60)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(str(i)) for i in range(4))),
+            timeout=1,
+        )
+
+    assert len(asyncio.run(run())) == 4
+    assert calls == [["0", "1"], ["2", "3"]]
+
+
+def test_errors_reach_every_caller():
+    async def embed_documents(texts):
+        raise RuntimeError("ollama down")
+
+    async def run():
+        batcher = EmbeddingBatcher(embed_documents, window_seconds=0.001)
+        return await asyncio.gather(
+            batcher.embed("a"),
+            batcher.embed("b"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,84 @@
+from dispute_resolution.services.fact_patterns import _AMOUNT_RE, extract_patterns, fill_missing
+
+
+EMPTY = {
+    "facts": {
+        "commercial_identifiers": {
+            "invoice_numbers": [],
+            "purchase_order_numbers": [],
+            "credit_note_numbers": [],
+        },
+        "financials": {
+            "disputed_amount": {"value": None, "currency": None, "direction": "UNKNOWN"},
+            "expected_amount": None,
+            "paid_amount": None,
+        },
+        "issue": {"category": "UNKNOWN", "description": ""},
+        "requested_action": {"type": "UNKNOWN"},
+    },
+    "confidence": {},
+    "missing_fields": [],
+    "evidence": {},
+}
+
+
+def test_identifiers_and_contextual_amounts():
+    result = extract_patterns(
+        "Overcharge on INV-2024-118",
+        "The agreed PO value is INR 1,20,000 against PO-7781 whereas the invoice "
+        "shows INR 1,35,000. The overcharged amount is INR 15,000. "
+        "Please issue a credit note.",
+        empty=EMPTY,
+    )
+    facts = result["facts"]
+
+    assert facts["commercial_identifiers"]["invoice_numbers"] == ["INV-2024-118"]
+    assert facts["commercial_identifiers"]["purchase_order_numbers"] == ["PO-7781"]
+    assert facts["financials"]["expected_amount"] == 120000.0
+    assert facts["financials"]["disputed_amount"] == {
+        "value": 15000.0,
+        "currency": "INR",
+        "direction": "OVERCHARGE",
+    }
+    # No keyword says which field INR 1,35,000 is, so it is not assigned
+    assert facts["financials"]["paid_amount"] is None
+    assert facts["issue"]["category"] == "OVERCHARGE"
+    assert facts["requested_action"]["type"] == "CREDIT_NOTE"
+    assert result["confidence"]["commercial_identifiers.invoice_numbers"] == 1.0
+    assert EMPTY["facts"]["commercial_identifiers"]["invoice_numbers"] == []
+
+
+def test_supplier_patterns_and_invalid_regex():
+    result = extract_patterns(
+        "Query",
+        "Bill ACME/24-25/0042 does not match our records.",
+        {"invoice_numbers": [r"\b(ACME/\d{2}-\d{2}/\d{4})", "(unclosed"]},
+        empty=EMPTY,
+    )
+
+    assert result["facts"]["commercial_identifiers"]["invoice_numbers"] == ["ACME/24-25/0042"]
+
+
+def test_fill_missing_keeps_llm_values():
+    found = extract_patterns("INV-9 short paid", "Short payment of INR 500", empty=EMPTY)
+    llm = extract_patterns("", "", empty=EMPTY)
+    llm["facts"]["commercial_identifiers"]["invoice_numbers"] = ["INV-7"]
+
+    fill_missing(llm, found)
+
+    assert llm["facts"]["commercial_identifiers"]["invoice_numbers"] == ["INV-7"]
+    assert llm["facts"]["financials"]["disputed_amount"]["value"] == 500.0
+    assert llm["facts"]["financials"]["disputed_amount"]["direction"] == "UNDERPAYMENT"
+
+
+def test_amount_keywords_must_directly_precede_the_amount():
+    for body in (
+        "The incorrect amount billed is INR 5,000",
+        "We agreed but you billed INR 5,000",
+        "There is an unexpected charge of INR 700",
+    ):
+        fin = extract_patterns("Invoice query", body, empty=EMPTY)["facts"]["financials"]
+        assert fin["expected_amount"] is None, body
+
+    assert _AMOUNT_RE.search("Thank you, yours 500") is None
+    assert _AMOUNT_RE.search("paid Rs. 500").group("value") == "500"
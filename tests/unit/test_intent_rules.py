@@ -0,0 +1,39 @@
+from dispute_resolution.services.intent_rules import pre_classify
+
+
+def test_explicit_overcharge_with_amounts_is_dispute():
+    result = pre_classify(
+        "Overcharge identified on Invoice INV-9123",
+        "We noticed an overcharge on Invoice INV-9123. The invoiced amount is "
+        "INR 18,750, whereas the agreed PO value was INR 16,500.",
+    )
+
+    assert result["intent"] == "DISPUTE"
+    assert result["route"] == "RULES"
+    assert result["reason"].startswith("Rule-based:")
+
+
+def test_greetings_and_auto_replies_are_not_disputes():
+    assert pre_classify("Happy New Year!", "Wishing you and the team a happy new year.")["intent"] == "NOT_DISPUTE"
+    assert pre_classify("Automatic reply: Invoice", "I am out of the office until Monday.")["intent"] == "NOT_DISPUTE"
+    assert pre_classify("Re: payment", "Thanks", {"auto-submitted": "auto-replied"})["intent"] == "NOT_DISPUTE"
+
+
+def test_unclear_emails_are_left_to_the_llm():
+    assert pre_classify("Invoice", "Please find attached invoice INV-2231.") is None
+    assert pre_classify(
+        "Follow-up: Overcharge on Invoice INV-9123",
+        "Following up on the overcharge on Invoice INV-9123. Awaiting the revised invoice.",
+    ) is None
+
+
+def test_bulk_header_alone_does_not_skip_the_llm():
+    overcharge = (
+        "Overcharge identified on Invoice INV-9123",
+        "We noticed an overcharge on Invoice INV-9123. The invoiced amount is "
+        "INR 18,750, whereas the agreed PO value was INR 16,500.",
+    )
+
+    assert pre_classify(*overcharge, {"precedence": "bulk"}) is None
+    assert pre_classify(*overcharge, {"auto-submitted": "auto-generated"}) is None
+    assert pre_classify("Statement", "Monthly statement attached.", {"precedence": "bulk"}) is None
@@ -0,0 +1,31 @@
+from dispute_resolution.utils.llm import JsonObjectScanner
+
+
+def _end_offset(chunks):
+    scanner = JsonObjectScanner()
+    for chunk in chunks:
+        end = scanner.feed(chunk)
+        if end is not None:
+            return end
+    return None
+
+
+def test_stops_when_top_level_object_closes():
+    chunks = ['```json\n{"intent": "DIS', 'PUTE", "facts": {"a": [1, ', '2]}}', "\n```\n\n\n"]
+    text = "".join(chunks)
+
+    end = _end_offset(chunks)
+
+    assert text[:end].endswith('[1, 2]}}')
+    assert end == text.index("}}") + 2
+
+
+def test_braces_inside_strings_are_ignored():
+    chunks = ['{"reason": "amount {INR} ', 'with \\"quoted\\" }"', ', "x": 1}trailing']
+
+    text = "".join(chunks)
+    assert text[:_end_offset(chunks)] == '{"reason": "amount {INR} with \\"quoted\\" }", "x": 1}'
+
+
+def test_incomplete_object_returns_none():
+    assert _end_offset(['{"intent": "DISPUTE", "facts": {']) is None
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from dispute_resolution.llm.cache import LLMCache, cache_key
+
+
+def test_cache_key_depends_on_model_options_and_prompt():
+    base = cache_key("gemma2:27b", {"temperature": 0.0}, "prompt")
+
+    assert base == cache_key("gemma2:27b", {"temperature": 0.0}, "prompt")
+    assert base != cache_key("gemma2:9b", {"temperature": 0.0}, "prompt")
+    assert base != cache_key("gemma2:27b", {"temperature": 0.0, "num_ctx": 4096}, "prompt")
+    assert base != cache_key("gemma2:27b", {"temperature": 0.0}, "prompt ")
+
+
+def test_get_returns_stored_response_until_ttl(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3", ttl_seconds=60, max_entries=10)
+    cache.put("k", '{"intent": "DISPUTE"}')
+
+    assert cache.get("k") == '{"intent": "DISPUTE"}'
+    assert cache.get("missing") is None
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_eviction_keeps_most_recently_used(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3", ttl_seconds=60, max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.put("c", "3")
+    time.sleep(0.01)
+    cache.get("a")
+
+    cache.evict()
+
+    assert len(cache) == 2
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.get("b") is None
+
+
+def test_async_access_and_batched_touches(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3", ttl_seconds=60, max_entries=10)
+
+    async def run():
+        await cache.aput("k", "v")
+        return await cache.aget("k")
+
+    assert asyncio.run(run()) == "v"
+    # The hit's access time is held in memory until the next write
+    assert "k" in cache._touched
+    cache.put("other", "x")
+    assert cache._touched == {}
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from dispute_resolution.llm.pool import OllamaPool, OllamaUnavailableError
+
+
+def _pool(**kwargs):
+    defaults = dict(
+        num_parallel=2,
+        max_retries=2,
+        retry_base_seconds=0.0,
+        failure_threshold=2,
+        cooldown_seconds=60.0,
+    )
+    return OllamaPool(["http://a", "http://b"], **{**defaults, **kwargs})
+
+
+def test_failed_attempt_is_retried_on_another_endpoint():
+    pool = _pool()
+    seen: list[str] = []
+
+    async def call(endpoint):
+        seen.append(endpoint.base_url)
+        if endpoint.base_url == "http://a":
+            raise ConnectionError("down")
+        return "ok"
+
+    assert asyncio.run(pool.acall(call)) == "ok"
+    assert seen == ["http://a", "http://b"]
+    assert all(e.outstanding == 0 for e in pool.endpoints)
+
+
+def test_least_outstanding_and_concurrency_limit():
+    pool = _pool(num_parallel=1)
+    running: dict[str, int] = {"http://a": 0, "http://b": 0}
+    peak: dict[str, int] = {"http://a": 0, "http://b": 0}
+
+    async def call(endpoint):
+        running[endpoint.base_url] += 1
+        peak[endpoint.base_url] = max(peak[endpoint.base_url], running[endpoint.base_url])
+        await asyncio.sleep(0.01)
+        running[endpoint.base_url] -= 1
+        return endpoint.base_url
+
+    async def run():
+        return await asyncio.gather(*(pool.acall(call) for _ in range(4)))
+
+    assert sorted(asyncio.run(run())) == ["http://a", "http://a", "http://b", "http://b"]
+    assert peak == {"http://a": 1, "http://b": 1}
+
+
+def test_circuit_opens_and_client_errors_are_not_retried():
+    pool = _pool(failure_threshold=1)
+    calls: list[str] = []
+
+    def failing(endpoint):
+        calls.append(endpoint.base_url)
+        raise ConnectionError("down")
+
+    with pytest.raises(OllamaUnavailableError):
+        pool.call(failing)
+    # Both nodes tripped after one failure each; the third attempt found none
+    assert calls == ["http://a", "http://b"]
+
+    class NotFound(Exception):
+        status_code = 404
+
+    def missing_model(endpoint):
+        calls.append(endpoint.base_url)
+        raise NotFound()
+
+    healthy = _pool()
+    with pytest.raises(NotFound):
+        healthy.call(missing_model)
+    assert len(calls) == 3
+    assert all(e.opened_at is None for e in healthy.endpoints)
+
+
+def test_affinity_keeps_shared_prefix_on_one_endpoint_while_it_has_slots():
+    pool = _pool(num_parallel=2)
+
+    async def call(endpoint):
+        await asyncio.sleep(0.01)
+        return endpoint.base_url
+
+    async def run(n):
+        return await asyncio.gather(*(pool.acall(call, affinity="EMAIL: INV-1") for _ in range(n)))
+
+    first, second = asyncio.run(run(2))
+    assert first == second
+
+    # A third concurrent call no longer fits there and spills over
+    assert len(set(asyncio.run(run(3)))) == 2
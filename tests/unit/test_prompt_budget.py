@@ -0,0 +1,23 @@
+from dispute_resolution.llm.budget import head_tail, join_head_tail
+
+
+def test_head_tail_keeps_both_ends():
+    text = "HEAD" + "x" * 1000 + "TAIL"
+
+    assert head_tail(text, 500, chars_per_token=4.0, label="t") == text
+
+    cut = head_tail(text, 10, chars_per_token=4.0, label="t")
+    assert cut.startswith("HEAD") and cut.endswith("TAIL")
+    assert "968 characters omitted" in cut
+
+
+def test_thread_keeps_first_and_most_recent_emails():
+    parts = [f"email {i} " + "y" * 90 for i in range(10)]
+
+    joined = join_head_tail(parts, 100, separator="\n---\n", chars_per_token=3.0, label="t")
+
+    assert joined.startswith("email 0 ")
+    assert joined.endswith(parts[-1])
+    assert "email 5 " not in joined
+    assert "messages omitted" in joined
+    assert len(joined) <= 300
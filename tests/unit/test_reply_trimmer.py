@@ -0,0 +1,56 @@
+from dispute_resolution.ingestion.reply_trimmer import trim_reply
+
+
+def test_drops_gmail_quote_and_signature():
+    body = (
+        "Hi Team,\n"
+        "The revised invoice INV-9123 still shows INR 18,750.\n"
+        "Regards,\n"
+        "ABC Chemicals\n"
+        "--\n"
+        "Rohit | Accounts | ABC Chemicals\n"
+        "On Mon, Jan 5, 2026 at 10:00 AM AP Team <ap@example.com>\n"
+        "wrote:\n"
+        "> Could you please share the invoice number?"
+    )
+
+    assert trim_reply(body) == (
+        "Hi Team,\n"
+        "The revised invoice INV-9123 still shows INR 18,750.\n"
+        "Regards,\n"
+        "ABC Chemicals"
+    )
+
+
+def test_drops_outlook_header_block():
+    body = (
+        "Please see the PO value below.\n"
+        "From: AP Team <ap@example.com>\n"
+        "Sent: Monday, January 5, 2026 10:00 AM\n"
+        "To: Rohit\n"
+        "Subject: Invoice INV-9901\n"
+        "There seems to be an issue with Invoice INV-9901."
+    )
+
+    assert trim_reply(body) == "Please see the PO value below."
+
+
+def test_keeps_forwarded_message():
+    forwarded = (
+        "---------- Forwarded message ---------\n"
+        "From: Rohit <rohit@abc.example>\n"
+        "Date: Mon, Jan 5, 2026 at 10:00 AM\n"
+        "Subject: Overcharge INV-1\n"
+        "To: AP Team <ap@example.com>\n"
+        "\n"
+        "Invoice INV-1 was billed at INR 15,000 over the PO value."
+    )
+    body = "See below.\n--\nMeera\n\n" + forwarded
+
+    assert trim_reply(body) == "See below.\n\n" + forwarded
+
+
+def test_keeps_body_when_nothing_new():
+    body = "> Forwarded quote only"
+
+    assert trim_reply(body) == body